@@ -10,4 +10,5 @@ urlpatterns = [
     path('vendor-list/', views.vendor_list_view, name='vendor_list'),
     path('reported-messages/', views.reported_messages_view, name='reported_messages'),
     path('reported-messages/clear-warnings/', views.clear_all_warnings_view, name='clear_all_warnings'),
+    path('api/catalog-cache-stats/', views.catalog_cache_stats_api, name='catalog_cache_stats_api'),
 ]
\ No newline at end of file
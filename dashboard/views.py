@@ -1,19 +1,49 @@
 # dashboard/views.py
 from django.shortcuts import render, redirect
+from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required
 from users.models import CustomUser, VendorProfile
 from products.models import Product
+from products.cache import catalog_cache_stats
 from datetime import datetime, timedelta
 from django.utils import timezone
 from django.contrib import messages
 from django.db import transaction
 from django.db.models import Count, Sum
-from notifications.utils import create_notification
+from django.db.models.functions import TruncDate
+from notifications.utils import NotificationBatch, create_notification
+from notifications.tasks import notify_users
 from users.suspension_utils import apply_suspension
 
 from messaging.models import MessageReport
+from messaging.utils import publish_messages_deleted
 from notifications.models import Notification
 
+def products_per_day_chart(days=7):
+    """
+    Labels and counts of products created per local day. A single range scan
+    on created_at (indexed) grouped by day, instead of one query per day.
+    """
+    today = timezone.localdate()
+    first_day = today - timedelta(days=days - 1)
+    range_start = timezone.make_aware(datetime.combine(first_day, datetime.min.time()))
+
+    daily_counts = dict(
+        Product.objects.filter(created_at__gte=range_start)
+        .annotate(day=TruncDate('created_at'))
+        .values('day')
+        .annotate(count=Count('id'))
+        .values_list('day', 'count')
+    )
+
+    chart_labels = []
+    chart_data = []
+    for i in range(days):
+        date = first_day + timedelta(days=i)
+        chart_labels.append(date.strftime('%b %d'))
+        chart_data.append(daily_counts.get(date, 0))
+    return chart_labels, chart_data
+
 @login_required
 def admin_dashboard_view(request):
     if not request.user.is_superuser:
@@ -35,18 +65,7 @@ def admin_dashboard_view(request):
     unresolved_reports = MessageReport.objects.filter(is_resolved=False).count()
     
     # Chart data: Products created per day for the last 7 days
-    today = timezone.now().date()
-    chart_labels = []
-    chart_data = []
-    
-    for i in range(6, -1, -1):
-        date = today - timedelta(days=i)
-        chart_labels.append(date.strftime('%b %d'))
-        # Count products created on this date
-        count = Product.objects.filter(
-            created_at__date=date
-        ).count()
-        chart_data.append(count)
+    chart_labels, chart_data = products_per_day_chart()
     
     # Recent activity for report table
     recent_products = Product.objects.select_related('vendor').order_by('-created_at')[:5]
@@ -163,7 +182,7 @@ def reported_messages_view(request):
             warned_users = set()
             suspended_results = []
             
-            with transaction.atomic():
+            with transaction.atomic(), NotificationBatch():
                 for report in reports:
                     offending_user = report.message.sender
                     
@@ -224,6 +243,7 @@ def reported_messages_view(request):
                 for report in reports:
                     report.message.is_moderator_deleted = True
                     report.message.save()
+                    publish_messages_deleted([report.message])
                     
                     report.is_resolved = True
                     report.moderator = request.user
@@ -233,13 +253,12 @@ def reported_messages_view(request):
                     report.save()
                     
                     # Send notification only once per user
-                    if report.message.sender.id not in notified_users:
-                        create_notification(
-                            recipient=report.message.sender,
-                            message=f"Your message was deleted by a moderator for violating community guidelines.",
-                            link=None
-                        )
-                        notified_users.add(report.message.sender.id)
+                    notified_users.add(report.message.sender.id)
+
+                notify_users.delay(
+                    sorted(notified_users),
+                    "Your message was deleted by a moderator for violating community guidelines.",
+                )
             
             messages.success(request, f"Deleted {len(selected_reports)} message(s) and notified {len(notified_users)} user(s).")
         
@@ -253,7 +272,7 @@ def reported_messages_view(request):
             # Immediately suspend users (triggers suspension system)
             banned_users = []
             
-            with transaction.atomic():
+            with transaction.atomic(), NotificationBatch():
                 for report in reports:
                     offending_user = report.message.sender
                     
@@ -342,7 +361,7 @@ def vendor_list_view(request):
         if bulk_action == 'suspend_1':
             # Apply 1st suspension (2 days)
             suspended_count = 0
-            with transaction.atomic():
+            with transaction.atomic(), NotificationBatch():
                 for vendor in vendors:
                     # Set to 1 warning so next suspension will be level 1
                     if vendor.suspension_count == 0:
@@ -354,7 +373,7 @@ def vendor_list_view(request):
         elif bulk_action == 'suspend_2':
             # Apply 2nd suspension (1 week + unverify + delete products)
             suspended_count = 0
-            with transaction.atomic():
+            with transaction.atomic(), NotificationBatch():
                 for vendor in vendors:
                     if vendor.suspension_count < 2:
                         # Force to 2nd suspension
@@ -368,7 +387,7 @@ def vendor_list_view(request):
         elif bulk_action == 'ban':
             # Permanent ban (3rd suspension)
             banned_count = 0
-            with transaction.atomic():
+            with transaction.atomic(), NotificationBatch():
                 for vendor in vendors:
                     if not vendor.is_permanently_banned:
                         # Force to 3rd suspension (permanent ban)
@@ -381,7 +400,7 @@ def vendor_list_view(request):
         
         elif bulk_action == 'lift_suspension':
             # Lift suspension and restore access
-            lifted_count = 0
+            lifted_ids = []
             with transaction.atomic():
                 for vendor in vendors:
                     if vendor.is_suspended and not vendor.is_permanently_banned:
@@ -389,30 +408,30 @@ def vendor_list_view(request):
                         vendor.suspension_end_date = None
                         vendor.is_active = True
                         vendor.save()
-                        
-                        create_notification(
-                            recipient=vendor,
-                            message="Your suspension has been lifted by an administrator. Please follow our community guidelines.",
-                            link=None
-                        )
-                        lifted_count += 1
+                        lifted_ids.append(vendor.pk)
+
+                notify_users.delay(
+                    lifted_ids,
+                    "Your suspension has been lifted by an administrator. Please follow our community guidelines.",
+                )
+            lifted_count = len(lifted_ids)
             messages.success(request, f"Lifted suspension for {lifted_count} vendor(s).")
         
         elif bulk_action == 'reset_warnings':
             # Reset warnings to 0
-            reset_count = 0
+            reset_ids = []
             with transaction.atomic():
                 for vendor in vendors:
                     if vendor.warning_count > 0:
                         vendor.warning_count = 0
                         vendor.save()
-                        
-                        create_notification(
-                            recipient=vendor,
-                            message="Your warnings have been reset to 0 by an administrator. This is a fresh start - please follow our guidelines.",
-                            link=None
-                        )
-                        reset_count += 1
+                        reset_ids.append(vendor.pk)
+
+                notify_users.delay(
+                    reset_ids,
+                    "Your warnings have been reset to 0 by an administrator. This is a fresh start - please follow our guidelines.",
+                )
+            reset_count = len(reset_ids)
             messages.success(request, f"Reset warnings to 0 for {reset_count} vendor(s).")
 
         return redirect('vendor_list')
@@ -426,4 +445,11 @@ def vendor_list_view(request):
     context = {
         'vendors': vendors
     }
-    return render(request, 'dashboard/vendor_list.html', context)
\ No newline at end of file
+    return render(request, 'dashboard/vendor_list.html', context)
+
+@login_required
+def catalog_cache_stats_api(request):
+    """Hit ratio and generation of the product_list_api response cache, for monitoring."""
+    if not request.user.is_superuser:
+        return JsonResponse({'error': 'Forbidden'}, status=403)
+    return JsonResponse(catalog_cache_stats())
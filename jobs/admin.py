@@ -0,0 +1,20 @@
+# jobs/admin.py
+from django.contrib import admin
+from django.utils import timezone
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'task_name', 'status', 'attempts', 'max_attempts', 'run_at', 'locked_by', 'finished_at')
+    list_filter = ('status', 'task_name')
+    search_fields = ('task_name', 'last_error')
+    readonly_fields = ('created_at', 'locked_at', 'locked_by', 'finished_at', 'last_error')
+    actions = ['retry_jobs']
+
+    @admin.action(description='Retry selected dead jobs now')
+    def retry_jobs(self, request, queryset):
+        updated = queryset.filter(status=Job.Status.DEAD).update(
+            status=Job.Status.PENDING, attempts=0, run_at=timezone.now(), last_error='',
+        )
+        self.message_user(request, f"Re-queued {updated} job(s).")
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class JobsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'jobs'
+
+    def ready(self):
+        # Import every app's tasks.py so @task functions are registered
+        # before a worker looks them up by name.
+        from django.utils.module_loading import autodiscover_modules
+        autodiscover_modules('tasks')
@@ -0,0 +1,61 @@
+# jobs/management/commands/run_worker.py
+import signal
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from jobs.models import Job
+from jobs.worker import make_pool, purge_finished_jobs, release_expired_leases, work_batch, worker_id
+
+# Housekeeping (stale leases, old successes) runs at most this often.
+HOUSEKEEPING_INTERVAL = 60
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs. Any number of workers can run side by side; "
+        "jobs are claimed with SELECT ... FOR UPDATE SKIP LOCKED."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4, help='Jobs executed in parallel by this worker.')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds to sleep when the queue is empty.')
+        parser.add_argument('--burst', action='store_true', help='Exit once no due jobs are left.')
+        parser.add_argument('--keep-days', type=int, default=7, help='Days to keep succeeded jobs before purging them.')
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        threads = max(1, options['threads'])
+        locked_by = worker_id()
+        keep = timedelta(days=options['keep_days'])
+        last_housekeeping = 0
+        self.stdout.write(f"Worker {locked_by} started with {threads} thread(s).")
+
+        with make_pool(threads) as pool:
+            while not self.stopping:
+                if time.monotonic() - last_housekeeping > HOUSEKEEPING_INTERVAL:
+                    released = release_expired_leases()
+                    if released:
+                        self.stdout.write(self.style.WARNING(f"Re-queued {released} job(s) with expired leases."))
+                    purge_finished_jobs(keep)
+                    last_housekeeping = time.monotonic()
+
+                statuses = work_batch(pool, threads, locked_by)
+                for status in statuses:
+                    if status == Job.Status.DEAD:
+                        self.stderr.write(self.style.ERROR("A job exhausted its retries; see the Job admin."))
+                if statuses:
+                    continue
+                if options['burst']:
+                    break
+                time.sleep(options['poll_interval'])
+
+        self.stdout.write(f"Worker {locked_by} stopped.")
+
+    def _stop(self, signum, frame):
+        # Finish the jobs already claimed, then exit.
+        self.stopping = True
@@ -0,0 +1,45 @@
+# jobs/models.py
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """One call of a registered @task, waiting for (or claimed by) a worker."""
+
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', 'Pending'
+        RUNNING = 'RUNNING', 'Running'
+        SUCCEEDED = 'SUCCEEDED', 'Succeeded'
+        DEAD = 'DEAD', 'Dead (gave up)'
+
+    task_name = models.CharField(max_length=200)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.task_name} #{self.pk} ({self.status})"
+
+    class Meta:
+        indexes = [
+            # The claim query only ever looks at due, pending jobs.
+            models.Index(
+                fields=['run_at', 'id'],
+                name='job_pending_run_at_idx',
+                condition=models.Q(status='PENDING'),
+            ),
+            models.Index(
+                fields=['locked_at'],
+                name='job_running_locked_idx',
+                condition=models.Q(status='RUNNING'),
+            ),
+        ]
@@ -0,0 +1,158 @@
+import threading
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from .models import Job
+from .utils import BACKOFF_BASE, task
+from .worker import LEASE_TIMEOUT, claim_jobs, release_expired_leases, run_job
+
+calls = []
+
+
+@task(name='jobs.tests.record', max_attempts=3)
+def record(value):
+    calls.append(value)
+
+
+@task(name='jobs.tests.explode', max_attempts=2)
+def explode():
+    raise RuntimeError('boom')
+
+
+class EnqueueTests(TestCase):
+    def test_delay_enqueues_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            record.delay(42)
+            self.assertFalse(Job.objects.exists())
+        job = Job.objects.get()
+        self.assertEqual((job.task_name, job.payload, job.max_attempts), ('jobs.tests.record', {'args': [42], 'kwargs': {}}, 3))
+
+    def test_rolled_back_work_enqueues_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                record.delay(42)
+                raise RuntimeError
+        self.assertEqual(callbacks, [])
+        self.assertFalse(Job.objects.exists())
+
+
+class RunJobTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def claimed(self, task_name, **fields):
+        Job.objects.create(task_name=task_name, **fields)
+        return claim_jobs(1, 'test-worker')[0]
+
+    def test_success(self):
+        job = self.claimed('jobs.tests.record', payload={'args': [7], 'kwargs': {}})
+        self.assertEqual(run_job(job), Job.Status.SUCCEEDED)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.locked_by), (Job.Status.SUCCEEDED, 1, ''))
+        self.assertEqual(calls, [7])
+
+    def test_failure_is_retried_after_backoff(self):
+        job = self.claimed('jobs.tests.explode')
+        before = timezone.now()
+        self.assertEqual(run_job(job), Job.Status.PENDING)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.locked_at), (Job.Status.PENDING, 1, None))
+        # First retry: BACKOFF_BASE seconds plus up to 20% jitter
+        self.assertGreaterEqual(job.run_at, before + timedelta(seconds=BACKOFF_BASE))
+        self.assertLessEqual(job.run_at, timezone.now() + timedelta(seconds=BACKOFF_BASE * 1.2))
+        self.assertIn('boom', job.last_error)
+
+    def test_job_is_dead_after_max_attempts(self):
+        job = self.claimed('jobs.tests.explode', max_attempts=2)
+        self.assertEqual(run_job(job), Job.Status.PENDING)
+        # Due again: claimed and failing for the second and last time
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        job = claim_jobs(1, 'test-worker')[0]
+        self.assertEqual(run_job(job), Job.Status.DEAD)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.Status.DEAD, 2))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_unknown_task_is_dead_at_once(self):
+        job = self.claimed('jobs.tests.no_such_task')
+        self.assertEqual(run_job(job), Job.Status.DEAD)
+
+    def test_expired_leases_are_reclaimed(self):
+        now = timezone.now()
+        abandoned = Job.objects.create(
+            task_name='jobs.tests.record', status=Job.Status.RUNNING,
+            locked_at=now - LEASE_TIMEOUT - timedelta(minutes=1), locked_by='crashed-worker',
+        )
+        busy = Job.objects.create(task_name='jobs.tests.record', status=Job.Status.RUNNING, locked_at=now, locked_by='live-worker')
+
+        self.assertEqual(release_expired_leases(), 1)
+        abandoned.refresh_from_db()
+        busy.refresh_from_db()
+        self.assertEqual((abandoned.status, abandoned.locked_by), (Job.Status.PENDING, ''))
+        self.assertEqual(busy.status, Job.Status.RUNNING)
+        self.assertEqual([job.pk for job in claim_jobs(10, 'test-worker')], [abandoned.pk])
+
+
+class ClaimContentionTests(TransactionTestCase):
+    """Workers claiming at the same time never get the same job."""
+
+    def test_rows_locked_by_another_worker_are_skipped(self):
+        jobs = [Job.objects.create(task_name='jobs.tests.record') for _ in range(4)]
+        locked = threading.Event()
+        release = threading.Event()
+
+        def other_worker():
+            # Holds the first two jobs mid-claim, as claim_jobs does
+            try:
+                with transaction.atomic():
+                    list(Job.objects.select_for_update().filter(pk__in=[jobs[0].pk, jobs[1].pk]))
+                    locked.set()
+                    release.wait(5)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=other_worker)
+        thread.start()
+        try:
+            self.assertTrue(locked.wait(5))
+            # Does not wait for the lock: takes what is free
+            claimed = claim_jobs(10, 'worker-b')
+        finally:
+            release.set()
+            thread.join()
+        self.assertEqual([job.pk for job in claimed], [jobs[2].pk, jobs[3].pk])
+        self.assertEqual([job.pk for job in claim_jobs(10, 'worker-a')], [jobs[0].pk, jobs[1].pk])
+
+    def test_concurrent_claims_are_disjoint(self):
+        Job.objects.bulk_create([Job(task_name='jobs.tests.record') for _ in range(200)])
+        workers = 8
+        start = threading.Barrier(workers)
+        claimed = {}
+        errors = []
+
+        def work(name):
+            try:
+                start.wait()
+                mine = claimed.setdefault(name, [])
+                while batch := claim_jobs(5, name):
+                    mine.extend(job.pk for job in batch)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=work, args=(f'worker-{i}',)) for i in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        all_claimed = [pk for pks in claimed.values() for pk in pks]
+        self.assertEqual(len(all_claimed), 200)
+        self.assertEqual(len(set(all_claimed)), 200)
+        for name, pks in claimed.items():
+            self.assertEqual(set(Job.objects.filter(pk__in=pks).values_list('locked_by', flat=True)) - {name}, set())
@@ -0,0 +1,84 @@
+# jobs/utils.py
+"""
+Registration and enqueueing of background tasks.
+
+    @task(max_attempts=3)
+    def send_receipt(order_id): ...
+
+    send_receipt.delay(order_id=42)
+
+delay() inserts the Job row from transaction.on_commit, so a job never
+runs against data that was rolled back, and a worker never sees a job
+before the rows it refers to are visible. Arguments must be JSON
+serializable; pass ids rather than model instances.
+"""
+import random
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Job
+
+DEFAULT_MAX_ATTEMPTS = 5
+# Retry n waits BACKOFF_BASE * 2**(n-1) seconds (plus jitter), capped.
+BACKOFF_BASE = 10
+BACKOFF_MAX = 60 * 60
+
+_registry = {}
+
+
+class UnknownTask(LookupError):
+    pass
+
+
+class Task:
+    def __init__(self, func, name, max_attempts):
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+        self.__doc__ = func.__doc__
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        """Queue this task to run on a worker once the current transaction commits."""
+        enqueue(self.name, args=args, kwargs=kwargs, max_attempts=self.max_attempts)
+
+
+def task(name=None, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """Register a function so it can be queued with .delay()."""
+    def decorator(func):
+        task_name = name or f'{func.__module__}.{func.__qualname__}'
+        registered = Task(func, task_name, max_attempts)
+        _registry[task_name] = registered
+        return registered
+    return decorator
+
+
+def get_task(name):
+    try:
+        return _registry[name]
+    except KeyError:
+        raise UnknownTask(name) from None
+
+
+def enqueue(task_name, args=(), kwargs=None, max_attempts=DEFAULT_MAX_ATTEMPTS, delay=None):
+    payload = {'args': list(args), 'kwargs': kwargs or {}}
+
+    def insert():
+        Job.objects.create(
+            task_name=task_name,
+            payload=payload,
+            max_attempts=max_attempts,
+            run_at=timezone.now() + (delay or timedelta()),
+        )
+
+    transaction.on_commit(insert)
+
+
+def retry_delay(attempts):
+    """Backoff before retry number `attempts` (1-based), with up to 20% jitter."""
+    seconds = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+    return timedelta(seconds=seconds * (1 + random.random() * 0.2))
@@ -0,0 +1,113 @@
+# jobs/worker.py
+"""
+Polling worker for the Job table.
+
+Jobs are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so any number of
+worker processes can share the table without handing the same job to two
+of them. Each job runs inside its own transaction: a failure rolls back
+its database writes before the retry is scheduled.
+"""
+import logging
+import os
+import socket
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import close_old_connections, connections, transaction
+from django.utils import timezone
+
+from .models import Job
+from .utils import UnknownTask, get_task, retry_delay
+
+logger = logging.getLogger(__name__)
+
+# A RUNNING job whose worker has not finished it in this long is assumed
+# to belong to a crashed process and is made claimable again.
+LEASE_TIMEOUT = timedelta(minutes=15)
+
+
+def worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim_jobs(limit, locked_by):
+    """Mark up to `limit` due jobs as RUNNING for this worker and return them."""
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.Status.PENDING, run_at__lte=now)
+            .order_by('run_at', 'id')
+            .values_list('id', flat=True)[:limit]
+        )
+        if not ids:
+            return []
+        Job.objects.filter(id__in=ids).update(status=Job.Status.RUNNING, locked_at=now, locked_by=locked_by)
+    return list(Job.objects.filter(id__in=ids).order_by('run_at', 'id'))
+
+
+def release_expired_leases():
+    """Put jobs abandoned by a dead worker back in the queue. Returns the count."""
+    with transaction.atomic():
+        ids = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.Status.RUNNING, locked_at__lt=timezone.now() - LEASE_TIMEOUT)
+            .values_list('id', flat=True)
+        )
+        return Job.objects.filter(id__in=ids).update(status=Job.Status.PENDING, locked_at=None, locked_by='')
+
+
+def run_job(job):
+    """Execute one claimed job and record the outcome. Returns the new status."""
+    attempts = job.attempts + 1
+    try:
+        func = get_task(job.task_name)
+        with transaction.atomic():
+            func(*job.payload.get('args', []), **job.payload.get('kwargs', {}))
+    except Exception as e:
+        error = traceback.format_exc()
+        if isinstance(e, UnknownTask) or attempts >= job.max_attempts:
+            status, run_at = Job.Status.DEAD, job.run_at
+            logger.error('Job %s (%s) is dead after %s attempt(s): %s', job.pk, job.task_name, attempts, e)
+        else:
+            status, run_at = Job.Status.PENDING, timezone.now() + retry_delay(attempts)
+            logger.warning('Job %s (%s) failed, retrying at %s: %s', job.pk, job.task_name, run_at, e)
+        Job.objects.filter(pk=job.pk).update(
+            status=status, attempts=attempts, run_at=run_at,
+            locked_at=None, locked_by='', last_error=error,
+            finished_at=timezone.now() if status == Job.Status.DEAD else None,
+        )
+        return status
+
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.Status.SUCCEEDED, attempts=attempts,
+        locked_at=None, locked_by='', finished_at=timezone.now(),
+    )
+    return Job.Status.SUCCEEDED
+
+
+def _run_in_thread(job):
+    try:
+        return run_job(job)
+    finally:
+        connections.close_all()
+
+
+def work_batch(pool, batch_size, locked_by):
+    """Claim one batch, run it on `pool` and wait for it. Returns the statuses."""
+    jobs = claim_jobs(batch_size, locked_by)
+    statuses = list(pool.map(_run_in_thread, jobs))
+    close_old_connections()
+    return statuses
+
+
+def make_pool(threads):
+    return ThreadPoolExecutor(max_workers=max(1, threads), thread_name_prefix='job-worker')
+
+
+def purge_finished_jobs(older_than):
+    """Delete SUCCEEDED jobs finished before now - older_than. DEAD jobs are kept for inspection."""
+    cutoff = timezone.now() - older_than
+    deleted, _ = Job.objects.filter(status=Job.Status.SUCCEEDED, finished_at__lt=cutoff).delete()
+    return deleted
@@ -2,6 +2,7 @@
 from django.contrib import admin
 from django.utils import timezone
 from .models import Conversation, Message, MessageReport
+from .utils import publish_messages_deleted
 from users.models import CustomUser 
 from notifications.utils import create_moderation_warning # <-- NEW IMPORT
 
@@ -73,6 +74,7 @@ class MessageReportAdmin(admin.ModelAdmin):
             message_to_delete = report.message
             message_to_delete.is_moderator_deleted = True
             message_to_delete.save()
+            publish_messages_deleted([message_to_delete])
             
             self._resolve_reports(
                 queryset.filter(pk=report.pk), 
@@ -0,0 +1,164 @@
+# messaging/consumers.py
+"""
+Live updates for the chat window over a WebSocket, served by the ASGI
+application itself (sarisari_project/asgi.py): /ws/messages/<id>/.
+
+Server -> client frames are the events published through messaging.fanout:
+    {"type": "message", "message": {...}}         new message (serialize_message)
+    {"type": "read", "user_id": 3}                 a participant read the chat
+    {"type": "message_deleted", "message_ids": []} removed by a moderator
+Client -> server: {"type": "read"} when the user has seen new messages.
+
+An idle socket also looks for messages it has not sent every
+CATCH_UP_SECONDS: with the in-process backend, messages written by the job
+worker (checkout receipts, pages.tasks) are never published to this process.
+"""
+import asyncio
+import json
+import re
+from importlib import import_module
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.http.cookie import parse_cookie
+from django.http.request import split_domain_port, validate_host
+from sarisari_project.streaming import database_sync_to_async
+from users.suspension_utils import check_and_lift_suspension
+from .fanout import OVERFLOW, conversation_group, get_backend
+from .models import ConversationSummary, Message
+from .summaries import mark_conversation_read
+from .utils import publish_read, serialize_message
+
+CHAT_SOCKET_PATH = re.compile(r'^/ws/messages/(?P<conversation_id>\d+)/$')
+
+# Close codes (4xxx mirror the HTTP status a view would have returned)
+CLOSE_TRY_AGAIN_LATER = 1013
+CLOSE_FORBIDDEN = 4403
+CLOSE_NOT_FOUND = 4404
+
+CATCH_UP_SECONDS = 20
+
+
+def origin_allowed(headers):
+    """Refuse cross-site pages: browsers send our session cookie with any socket."""
+    origin = headers.get('origin')
+    if not origin:
+        return True  # not a browser
+    host, _ = split_domain_port(urlsplit(origin).netloc)
+    return bool(host) and validate_host(host, settings.ALLOWED_HOSTS)
+
+
+@database_sync_to_async
+def authenticate(headers, conversation_id):
+    """The participant behind the session cookie, or None."""
+    session_key = parse_cookie(headers.get('cookie', '')).get(settings.SESSION_COOKIE_NAME)
+    if not session_key:
+        return None
+    session = import_module(settings.SESSION_ENGINE).SessionStore(session_key)
+    user = get_user(SimpleNamespace(session=session))
+    if not user.is_authenticated:
+        return None
+    # Same rules as SuspensionCheckMiddleware
+    check_and_lift_suspension(user)
+    if user.is_permanently_banned or user.is_suspended:
+        return None
+    if not ConversationSummary.objects.filter(conversation_id=conversation_id, user=user).exists():
+        return None
+    return user
+
+
+@database_sync_to_async
+def read_conversation(conversation_id, user_id):
+    if mark_conversation_read(conversation_id, user_id):
+        publish_read(conversation_id, user_id)
+
+
+@database_sync_to_async
+def latest_message_id(conversation_id):
+    return Message.objects.filter(conversation_id=conversation_id).order_by('-id').values_list('id', flat=True).first() or 0
+
+
+@database_sync_to_async
+def messages_after(conversation_id, message_id, user):
+    """Message events for the conversation's messages newer than `message_id`."""
+    messages = Message.objects.filter(conversation_id=conversation_id, id__gt=message_id).select_related('sender')
+    return [{'type': 'message', 'message': serialize_message(m, user)} for m in messages.order_by('id')]
+
+
+def for_user(event, user):
+    if event['type'] == 'message':
+        message = event['message']
+        return {**event, 'message': {**message, 'is_outgoing': message['sender_id'] == user.pk}}
+    return event
+
+
+async def read_frames(receive, conversation_id, user):
+    """Handle client frames; returns when the client disconnects."""
+    while True:
+        event = await receive()
+        if event['type'] == 'websocket.disconnect':
+            return
+        if event['type'] != 'websocket.receive':
+            continue
+        try:
+            frame = json.loads(event.get('text') or '')
+        except ValueError:
+            continue
+        if isinstance(frame, dict) and frame.get('type') == 'read':
+            await read_conversation(conversation_id, user.pk)
+
+
+async def chat_socket(scope, receive, send, conversation_id):
+    if (await receive())['type'] != 'websocket.connect':
+        return
+    headers = {name.decode('latin1').lower(): value.decode('latin1') for name, value in scope.get('headers', [])}
+    if not origin_allowed(headers):
+        await send({'type': 'websocket.close', 'code': CLOSE_FORBIDDEN})
+        return
+    user = await authenticate(headers, conversation_id)
+    if user is None:
+        await send({'type': 'websocket.close', 'code': CLOSE_FORBIDDEN})
+        return
+
+    # Subscribe before accepting so nothing published after the handshake is missed
+    async with get_backend().subscribe(conversation_group(conversation_id)) as queue:
+        last_message_id = await latest_message_id(conversation_id)
+        await send({'type': 'websocket.accept'})
+        reader = asyncio.ensure_future(read_frames(receive, conversation_id, user))
+        getter = None
+        try:
+            while True:
+                if getter is None:
+                    getter = asyncio.ensure_future(queue.get())
+                await asyncio.wait({getter, reader}, timeout=CATCH_UP_SECONDS, return_when=asyncio.FIRST_COMPLETED)
+                if reader.done():
+                    break  # client went away
+                if getter.done():
+                    events = [getter.result()]
+                    getter = None
+                else:
+                    events = await messages_after(conversation_id, last_message_id, user)
+                for event in events:
+                    if event is OVERFLOW:
+                        await send({'type': 'websocket.close', 'code': CLOSE_TRY_AGAIN_LATER})
+                        return
+                    if event['type'] == 'message':
+                        # The page drops a message it already shows
+                        last_message_id = max(last_message_id, event['message']['id'])
+                    await send({'type': 'websocket.send', 'text': json.dumps(for_user(event, user))})
+        finally:
+            reader.cancel()
+            if getter is not None:
+                getter.cancel()
+
+
+async def websocket_application(scope, receive, send):
+    """Route WebSocket connections; everything else goes to Django."""
+    match = CHAT_SOCKET_PATH.match(scope['path'])
+    if match is None:
+        await receive()  # websocket.connect
+        await send({'type': 'websocket.close', 'code': CLOSE_NOT_FOUND})
+        return
+    await chat_socket(scope, receive, send, int(match['conversation_id']))
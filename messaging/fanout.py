@@ -0,0 +1,145 @@
+# messaging/fanout.py
+"""
+Fan-out of live events to open connections: the chat WebSockets (one group
+per conversation, see messaging.consumers) and the notification streams
+(one group per user, see notifications.views).
+
+Views and signals publish events (plain JSON-able dicts) to a group; each
+connection subscribes to its group. The backend is chosen by
+MESSAGING_FANOUT_BACKEND:
+
+- InProcessBackend delivers to sockets held by the same process. Enough for
+  a single worker, development and tests.
+- RedisBackend relays through Redis pub/sub so every worker sees every
+  event. Each process keeps one Redis subscription, shared by its sockets.
+"""
+import asyncio
+import json
+import threading
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+# Events a socket may fall behind by before it is dropped (the client
+# reconnects and reloads the page instead of missing messages).
+MAX_PENDING_EVENTS = 100
+# Put in a subscriber's queue when it fell too far behind
+OVERFLOW = object()
+
+
+def conversation_group(conversation_id):
+    return f'conversation.{conversation_id}'
+
+
+def _offer(queue, event):
+    if queue.full():
+        # Too far behind: drop the backlog and tell the consumer to close
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(OVERFLOW)
+    else:
+        queue.put_nowait(event)
+
+
+class InProcessBackend:
+    def __init__(self):
+        self._groups = {}  # group -> {(loop, queue)}
+        self._lock = threading.Lock()
+
+    def publish(self, group, event):
+        """Send `event` to every subscriber of `group`. Safe to call from any thread."""
+        self.dispatch(group, event)
+
+    def dispatch(self, group, event):
+        with self._lock:
+            subscribers = list(self._groups.get(group, ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(_offer, queue, event)
+
+    def subscriber_count(self, group=None):
+        with self._lock:
+            if group is not None:
+                return len(self._groups.get(group, ()))
+            return sum(len(subscribers) for subscribers in self._groups.values())
+
+    @asynccontextmanager
+    async def subscribe(self, group):
+        """Yield an asyncio.Queue that receives the events published to `group`."""
+        queue = asyncio.Queue(MAX_PENDING_EVENTS)
+        subscriber = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            first = group not in self._groups
+            self._groups.setdefault(group, set()).add(subscriber)
+        if first:
+            await self.group_added(group)
+        try:
+            yield queue
+        finally:
+            with self._lock:
+                subscribers = self._groups.get(group, set())
+                subscribers.discard(subscriber)
+                last = not subscribers
+                if last:
+                    self._groups.pop(group, None)
+            if last:
+                await self.group_removed(group)
+
+    async def group_added(self, group):
+        """Hook: the first local socket joined `group`."""
+
+    async def group_removed(self, group):
+        """Hook: the last local socket left `group`."""
+
+
+class RedisBackend(InProcessBackend):
+    def __init__(self, url=None, prefix='fanout:'):
+        super().__init__()
+        self.url = url or settings.MESSAGING_FANOUT_URL
+        self.prefix = prefix
+        self._publisher = None
+        self._pubsub = None
+        self._listener = None
+
+    def publish(self, group, event):
+        # Not dispatched locally: our own subscription delivers it back.
+        if self._publisher is None:
+            import redis
+            self._publisher = redis.Redis.from_url(self.url)
+        self._publisher.publish(self.prefix + group, json.dumps(event))
+
+    async def group_added(self, group):
+        if self._pubsub is None:
+            import redis.asyncio
+            self._pubsub = redis.asyncio.Redis.from_url(self.url).pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(self.prefix + group)
+        # listen() returns once nothing is subscribed; restart it on demand
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+    async def group_removed(self, group):
+        await self._pubsub.unsubscribe(self.prefix + group)
+
+    async def _listen(self):
+        async for message in self._pubsub.listen():
+            if message['type'] != 'message':
+                continue
+            channel = message['channel'].decode()
+            self.dispatch(channel[len(self.prefix):], json.loads(message['data']))
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    return import_string(settings.MESSAGING_FANOUT_BACKEND)()
+
+
+def publish_group(group, event):
+    """Publish `event` to `group` once the transaction commits."""
+    transaction.on_commit(lambda: get_backend().publish(group, event))
+
+
+def publish(conversation_id, event):
+    """Publish `event` to a conversation's sockets once the transaction commits."""
+    publish_group(conversation_group(conversation_id), event)
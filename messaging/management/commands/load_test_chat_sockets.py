@@ -0,0 +1,158 @@
+# messaging/management/commands/load_test_chat_sockets.py
+import asyncio
+import json
+import statistics
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from messaging.models import Conversation
+
+
+def session_cookie(user):
+    """A logged-in session for `user`, as the test client's force_login() makes it."""
+    session = import_module(settings.SESSION_ENGINE).SessionStore()
+    session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+    return session.session_key
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))] if values else 0.0
+
+
+class Command(BaseCommand):
+    help = (
+        "Hold many chat WebSockets open against one running web worker, post "
+        "messages over HTTP and measure how long the worker takes to fan each one "
+        "out to every socket. Posts real messages: use a throwaway conversation. "
+        "Raise the open-files limit (ulimit -n) on both ends for large runs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('conversation', type=int, help='Conversation to connect to and post in.')
+        parser.add_argument('--base-url', default='http://localhost:8000', help='The worker under test.')
+        parser.add_argument('--connections', type=int, default=1000, help='Sockets to hold open.')
+        parser.add_argument('--messages', type=int, default=20, help='Messages to post once connected.')
+        parser.add_argument('--connect-concurrency', type=int, default=100, help='Handshakes in flight at once.')
+        parser.add_argument('--timeout', type=float, default=10.0, help='Seconds to wait for each fan-out.')
+
+    def handle(self, *args, **options):
+        try:
+            import requests
+            import websockets
+        except ImportError:
+            raise CommandError("The load test needs the 'websockets' and 'requests' packages.")
+        self.requests, self.websockets = requests, websockets
+
+        conversation = Conversation.objects.filter(pk=options['conversation']).first()
+        if conversation is None:
+            raise CommandError(f"Conversation {options['conversation']} does not exist.")
+        participants = list(conversation.participants.order_by('pk'))
+        if not participants:
+            raise CommandError("The conversation has no participants.")
+
+        base_url = options['base_url'].rstrip('/')
+        self.socket_url = base_url.replace('http', 'ws', 1) + f'/ws/messages/{conversation.pk}/'
+        self.page_url = base_url + reverse('conversation_detail', kwargs={'conversation_id': conversation.pk})
+        # Sockets alternate between the participants; the first one posts
+        self.sessions = [session_cookie(user) for user in participants]
+
+        asyncio.run(self.run(options))
+
+    # --- Posting over HTTP (run in a thread) ---
+
+    def make_poster(self):
+        http = self.requests.Session()
+        http.cookies.set(settings.SESSION_COOKIE_NAME, self.sessions[0])
+        http.get(self.page_url).raise_for_status()  # sets the CSRF cookie
+        return http
+
+    def post_message(self, http, text):
+        response = http.post(self.page_url, data={'text_content': text}, headers={
+            'X-Requested-With': 'XMLHttpRequest',
+            'X-CSRFToken': http.cookies.get(settings.CSRF_COOKIE_NAME, ''),
+            'Referer': self.page_url,
+        })
+        response.raise_for_status()
+        return response.json()['message']['id']
+
+    # --- Sockets ---
+
+    async def open_socket(self, index, gate, connect_times):
+        cookie = f"{settings.SESSION_COOKIE_NAME}={self.sessions[index % len(self.sessions)]}"
+        async with gate:
+            began = time.perf_counter()
+            socket = await self.websockets.connect(self.socket_url, extra_headers=[('Cookie', cookie)], max_queue=None)
+            connect_times.append(time.perf_counter() - began)
+        return socket
+
+    async def listen(self, socket, arrivals):
+        try:
+            async for frame in socket:
+                event = json.loads(frame)
+                if event['type'] == 'message':
+                    arrivals.setdefault(event['message']['id'], []).append(time.perf_counter())
+        except self.websockets.ConnectionClosed:
+            pass
+
+    async def run(self, options):
+        loop = asyncio.get_running_loop()
+        count = options['connections']
+        gate = asyncio.Semaphore(max(1, options['connect_concurrency']))
+        connect_times = []
+
+        began = time.perf_counter()
+        results = await asyncio.gather(
+            *(self.open_socket(i, gate, connect_times) for i in range(count)), return_exceptions=True,
+        )
+        sockets = [r for r in results if not isinstance(r, BaseException)]
+        failures = [r for r in results if isinstance(r, BaseException)]
+        self.stdout.write(
+            f"Opened {len(sockets)}/{count} sockets in {time.perf_counter() - began:.2f}s "
+            f"(handshake p50 {percentile(connect_times, 50) * 1000:.1f} ms, "
+            f"p99 {percentile(connect_times, 99) * 1000:.1f} ms)"
+        )
+        if failures:
+            self.stdout.write(self.style.WARNING(f"{len(failures)} failed, e.g. {failures[0]!r}"))
+        if not sockets:
+            raise CommandError("No socket could connect.")
+
+        arrivals = {}
+        listeners = [asyncio.ensure_future(self.listen(socket, arrivals)) for socket in sockets]
+        http = await loop.run_in_executor(None, self.make_poster)
+
+        latencies, complete = [], 0
+        for n in range(options['messages']):
+            sent_at = time.perf_counter()
+            message_id = await loop.run_in_executor(None, self.post_message, http, f"load test {n + 1}")
+            deadline = sent_at + options['timeout']
+            while len(arrivals.get(message_id, ())) < len(sockets) and time.perf_counter() < deadline:
+                await asyncio.sleep(0.005)
+            received = arrivals.get(message_id, [])
+            complete += len(received) == len(sockets)
+            latencies.extend(arrived - sent_at for arrived in received)
+
+        for socket in sockets:
+            await socket.close()
+        await asyncio.gather(*listeners)
+
+        delivered = len(latencies)
+        self.stdout.write(
+            f"{options['messages']} messages x {len(sockets)} sockets: {delivered} deliveries, "
+            f"{complete} messages reached every socket"
+        )
+        if latencies:
+            self.stdout.write(
+                f"Post-to-delivery latency: p50 {percentile(latencies, 50) * 1000:.1f} ms, "
+                f"p99 {percentile(latencies, 99) * 1000:.1f} ms, max {max(latencies) * 1000:.1f} ms, "
+                f"mean {statistics.mean(latencies) * 1000:.1f} ms"
+            )
+        self.stdout.write(self.style.SUCCESS(f"{len(sockets)} concurrent connections held by one worker."))
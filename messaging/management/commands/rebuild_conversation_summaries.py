@@ -0,0 +1,39 @@
+# messaging/management/commands/rebuild_conversation_summaries.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min
+
+from messaging.models import Conversation
+from messaging.summaries import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every ConversationSummary (last message, unread counts) from the "
+        "messages themselves. Works through conversation ids in batches, one "
+        "transaction per batch, so the inbox stays usable while it runs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Conversation ids per transaction.')
+        parser.add_argument('--conversation', type=int, help='Only rebuild this conversation.')
+
+    def handle(self, *args, **options):
+        if options['conversation']:
+            lo = hi = options['conversation']
+        else:
+            bounds = Conversation.objects.aggregate(lo=Min('id'), hi=Max('id'))
+            if bounds['lo'] is None:
+                self.stdout.write("No conversations to rebuild.")
+                return
+            lo, hi = bounds['lo'], bounds['hi']
+
+        batch = max(1, options['batch_size'])
+        rows = 0
+        for start in range(lo, hi + 1, batch):
+            end = min(start + batch, hi + 1)
+            with transaction.atomic():
+                rows += rebuild_summaries(start, end)
+            self.stdout.write(f"Conversations {start}-{end - 1}: {rows} summary rows so far")
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} conversation summaries."))
@@ -0,0 +1,51 @@
+from collections import defaultdict
+
+from django.db import migrations
+
+
+def backfill_pair_keys(apps, schema_editor):
+    """
+    Key every one-to-one conversation by its participants. When a pair has
+    several conversations, the oldest one keeps the key and the others'
+    messages (and notification links) are moved into it before they are
+    deleted.
+    """
+    Conversation = apps.get_model('messaging', 'Conversation')
+    Message = apps.get_model('messaging', 'Message')
+    Notification = apps.get_model('notifications', 'Notification')
+    Participant = Conversation.participants.through
+
+    members = defaultdict(set)
+    for conversation_id, user_id in Participant.objects.values_list('conversation_id', 'customuser_id').iterator():
+        members[conversation_id].add(user_id)
+
+    by_key = defaultdict(list)
+    for conversation_id, user_ids in members.items():
+        if len(user_ids) == 2:
+            low, high = sorted(user_ids)
+            by_key[f'{low}:{high}'].append(conversation_id)
+
+    keepers = []
+    for key, conversation_ids in by_key.items():
+        keeper, *duplicates = sorted(conversation_ids)
+        if duplicates:
+            Message.objects.filter(conversation_id__in=duplicates).update(conversation_id=keeper)
+            Notification.objects.filter(
+                link__in=[f'/messages/{duplicate}/' for duplicate in duplicates]
+            ).update(link=f'/messages/{keeper}/')
+            Conversation.objects.filter(pk__in=duplicates).delete()
+        keepers.append(Conversation(pk=keeper, pair_key=key))
+
+    Conversation.objects.bulk_update(keepers, ['pair_key'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0003_conversation_pair_key'),
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_pair_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.6 on 2026-10-17 21:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# One summary row per participant, computed from the existing messages.
+BACKFILL_SUMMARIES = """
+    INSERT INTO messaging_conversationsummary (conversation_id, user_id, last_message_id, last_message_at, unread_count)
+    SELECT p.conversation_id, p.customuser_id, latest.id, COALESCE(latest.timestamp, c.created_at),
+           (SELECT COUNT(*) FROM messaging_message m
+             WHERE m.conversation_id = p.conversation_id AND NOT m.is_read
+               AND m.sender_id <> p.customuser_id)
+      FROM messaging_conversation_participants p
+      JOIN messaging_conversation c ON c.id = p.conversation_id
+      LEFT JOIN LATERAL (
+            SELECT m.id, m.timestamp FROM messaging_message m
+             WHERE m.conversation_id = p.conversation_id
+             ORDER BY m.timestamp DESC, m.id DESC LIMIT 1
+      ) latest ON TRUE
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0004_backfill_conversation_pair_keys'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConversationSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_message_at', models.DateTimeField()),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('conversation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='summaries', to='messaging.conversation')),
+                ('last_message', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='messaging.message')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversation_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-last_message_at', '-id'], name='convsummary_user_recent_idx')],
+                'constraints': [models.UniqueConstraint(fields=('conversation', 'user'), name='conversation_summary_uniq')],
+            },
+        ),
+        migrations.RunSQL(BACKFILL_SUMMARIES, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.6 on 2026-10-17 21:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# A participant's watermark is the last message before the first one from
+# someone else that they have not read (or the newest message if they have
+# read everything); unread_count is then recounted against it.
+MIGRATE_IS_READ = """
+    UPDATE messaging_conversationsummary s
+       SET last_read_message_id = (
+            SELECT m.id FROM messaging_message m
+             WHERE m.conversation_id = s.conversation_id
+               AND m.id < COALESCE((
+                    SELECT MIN(u.id) FROM messaging_message u
+                     WHERE u.conversation_id = s.conversation_id
+                       AND NOT u.is_read AND u.sender_id <> s.user_id
+               ), 9223372036854775807)
+             ORDER BY m.id DESC LIMIT 1
+       );
+    UPDATE messaging_conversationsummary s
+       SET unread_count = (
+            SELECT COUNT(*) FROM messaging_message m
+             WHERE m.conversation_id = s.conversation_id
+               AND m.sender_id <> s.user_id
+               AND m.id > COALESCE(s.last_read_message_id, 0)
+       );
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0006_message_history_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversationsummary',
+            name='last_read_message',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='messaging.message'),
+        ),
+        migrations.RunSQL(MIGRATE_IS_READ, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-17 21:29
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # Kept apart from 0007 so the column is dropped only after the read
+    # state has been copied into the watermarks (and in its own transaction).
+
+    dependencies = [
+        ('messaging', '0007_read_watermark'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='message',
+            name='is_read',
+        ),
+    ]
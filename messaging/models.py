@@ -15,6 +15,9 @@ class Conversation(models.Model):
     A conversation between two or more users.
     """
     participants = models.ManyToManyField(CustomUser, related_name='conversations')
+    # "<lower user id>:<higher user id>" for one-to-one conversations, so
+    # each pair of users has exactly one. NULL for group conversations.
+    pair_key = models.CharField(max_length=41, unique=True, null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -34,7 +37,6 @@ class Message(models.Model):
     media_file = models.FileField(upload_to='chat_media/', blank=True, null=True)
     
     timestamp = models.DateTimeField(auto_now_add=True)
-    is_read = models.BooleanField(default=False)
 
     # NEW FIELD: To flag message as deleted/hidden by a moderator (Soft Delete)
     is_moderator_deleted = models.BooleanField(default=False) 
@@ -44,6 +46,43 @@ class Message(models.Model):
 
     class Meta:
         ordering = ['timestamp'] # Show oldest messages first in a chat window
+        indexes = [
+            # Chat history pages: WHERE conversation = %s AND (timestamp, id) < cursor
+            models.Index(fields=['conversation', 'timestamp', 'id'], name='message_conversation_time_idx'),
+            # The chat window never shows moderated messages; keep them out of its index
+            models.Index(
+                fields=['conversation', '-timestamp', '-id'],
+                name='message_visible_recent_idx',
+                condition=models.Q(is_moderator_deleted=False),
+            ),
+        ]
+
+class ConversationSummary(models.Model):
+    """
+    Inbox row for one participant of one conversation, kept up to date by
+    messaging.summaries so the inbox never aggregates messaging_message.
+    """
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='summaries')
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='conversation_summaries')
+    last_message = models.ForeignKey(Message, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    # Time of the latest message, or when the conversation started if it has none
+    last_message_at = models.DateTimeField()
+    unread_count = models.PositiveIntegerField(default=0)
+    # Read watermark: every message up to and including this one has been
+    # seen by `user`. Unread = messages from others with a higher id.
+    last_read_message = models.ForeignKey(Message, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    def __str__(self):
+        return f"Summary of conversation {self.conversation_id} for user {self.user_id}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['conversation', 'user'], name='conversation_summary_uniq'),
+        ]
+        indexes = [
+            # "My conversations, most recent first" (keyset pagination)
+            models.Index(fields=['user', '-last_message_at', '-id'], name='convsummary_user_recent_idx'),
+        ]
 
 # NEW MODEL: MessageReport (for Admin Moderation Tools)
 class MessageReport(models.Model):
@@ -0,0 +1,25 @@
+# messaging/signals.py
+from django.db.models.signals import m2m_changed, post_save
+from django.dispatch import receiver
+from .models import Conversation, Message
+from .summaries import add_participants, record_messages
+from .utils import publish_messages
+
+
+@receiver(post_save, sender=Message)
+def update_summaries_on_message(sender, instance, created, **kwargs):
+    """bulk_create() skips this signal; callers use record_messages() and publish_messages() directly."""
+    if created:
+        record_messages([instance.pk])
+        publish_messages([instance])
+
+
+@receiver(m2m_changed, sender=Conversation.participants.through)
+def create_summaries_for_participants(sender, instance, action, reverse, pk_set, **kwargs):
+    if action != 'post_add' or not pk_set:
+        return
+    if reverse:
+        # user.conversations.add(...): instance is the user
+        add_participants((conversation_id, instance.pk) for conversation_id in pk_set)
+    else:
+        add_participants((instance.pk, user_id) for user_id in pk_set)
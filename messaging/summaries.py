@@ -0,0 +1,109 @@
+# messaging/summaries.py
+"""
+Upkeep of ConversationSummary, the per-participant inbox row.
+
+Every write is a single set-based statement, so recording one message or
+a bulk_create()d batch of receipts costs the same single query.
+"""
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Conversation, ConversationSummary, Message
+
+SUMMARY_TABLE = ConversationSummary._meta.db_table
+MESSAGE_TABLE = Message._meta.db_table
+CONVERSATION_TABLE = Conversation._meta.db_table
+PARTICIPANT_TABLE = Conversation.participants.through._meta.db_table
+
+# Folds the messages in %(ids)s into the summaries of every participant of
+# their conversations: unread counters grow by the messages others sent, and
+# the last message moves forward (never backwards).
+RECORD_MESSAGES_SQL = f"""
+    INSERT INTO {SUMMARY_TABLE} (conversation_id, user_id, last_message_id, last_message_at, unread_count)
+    SELECT p.conversation_id, p.customuser_id, latest.id, latest.timestamp,
+           (SELECT COUNT(*) FROM {MESSAGE_TABLE} m
+             WHERE m.id = ANY(%(ids)s) AND m.conversation_id = p.conversation_id
+               AND m.sender_id <> p.customuser_id)
+      FROM {PARTICIPANT_TABLE} p
+      JOIN LATERAL (
+            SELECT m.id, m.timestamp FROM {MESSAGE_TABLE} m
+             WHERE m.id = ANY(%(ids)s) AND m.conversation_id = p.conversation_id
+             ORDER BY m.timestamp DESC, m.id DESC LIMIT 1
+      ) latest ON TRUE
+     WHERE p.conversation_id IN (SELECT conversation_id FROM {MESSAGE_TABLE} WHERE id = ANY(%(ids)s))
+    ON CONFLICT (conversation_id, user_id) DO UPDATE SET
+        unread_count = {SUMMARY_TABLE}.unread_count + EXCLUDED.unread_count,
+        last_message_id = CASE WHEN EXCLUDED.last_message_at >= {SUMMARY_TABLE}.last_message_at
+                               THEN EXCLUDED.last_message_id ELSE {SUMMARY_TABLE}.last_message_id END,
+        last_message_at = GREATEST({SUMMARY_TABLE}.last_message_at, EXCLUDED.last_message_at)
+"""
+
+# Recomputes the summaries of the conversations with lo <= id < hi from
+# messaging_message alone. Existing read watermarks are kept; unread counts
+# are recounted against them.
+DELETE_ORPHANS_SQL = f"""
+    DELETE FROM {SUMMARY_TABLE} s
+     WHERE s.conversation_id >= %(lo)s AND s.conversation_id < %(hi)s
+       AND NOT EXISTS (SELECT 1 FROM {PARTICIPANT_TABLE} p
+                        WHERE p.conversation_id = s.conversation_id AND p.customuser_id = s.user_id)
+"""
+REBUILD_SQL = f"""
+    INSERT INTO {SUMMARY_TABLE} (conversation_id, user_id, last_message_id, last_message_at, unread_count)
+    SELECT p.conversation_id, p.customuser_id, latest.id, COALESCE(latest.timestamp, c.created_at),
+           (SELECT COUNT(*) FROM {MESSAGE_TABLE} m
+             WHERE m.conversation_id = p.conversation_id AND m.sender_id <> p.customuser_id
+               AND m.id > COALESCE(s.last_read_message_id, 0))
+      FROM {PARTICIPANT_TABLE} p
+      JOIN {CONVERSATION_TABLE} c ON c.id = p.conversation_id
+      LEFT JOIN {SUMMARY_TABLE} s ON s.conversation_id = p.conversation_id AND s.user_id = p.customuser_id
+      LEFT JOIN LATERAL (
+            SELECT m.id, m.timestamp FROM {MESSAGE_TABLE} m
+             WHERE m.conversation_id = p.conversation_id
+             ORDER BY m.timestamp DESC, m.id DESC LIMIT 1
+      ) latest ON TRUE
+     WHERE p.conversation_id >= %(lo)s AND p.conversation_id < %(hi)s
+    ON CONFLICT (conversation_id, user_id) DO UPDATE SET
+        last_message_id = EXCLUDED.last_message_id,
+        last_message_at = EXCLUDED.last_message_at,
+        unread_count = EXCLUDED.unread_count
+"""
+
+
+def record_messages(message_ids):
+    """Fold newly created messages into their conversations' summaries."""
+    message_ids = list(message_ids)
+    if not message_ids:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(RECORD_MESSAGES_SQL, {'ids': message_ids})
+
+
+def add_participants(pairs):
+    """
+    Create empty summary rows so new conversations show up in the inbox
+    before their first message. Takes (conversation_id, user_id) pairs.
+    """
+    now = timezone.now()
+    ConversationSummary.objects.bulk_create([
+        ConversationSummary(conversation_id=conversation_id, user_id=user_id, last_message_at=now)
+        for conversation_id, user_id in pairs
+    ], ignore_conflicts=True)
+
+
+def mark_conversation_read(conversation_id, user_id):
+    """
+    Move the reader's watermark to the newest message: one row is written
+    no matter how many messages were unread. Returns whether it moved.
+    """
+    return ConversationSummary.objects.filter(conversation_id=conversation_id, user_id=user_id).exclude(
+        last_read_message=F('last_message'), unread_count=0,
+    ).update(last_read_message=F('last_message'), unread_count=0)
+
+
+def rebuild_summaries(lo, hi):
+    """Recompute the summaries of conversations lo <= id < hi. Call inside a transaction."""
+    with connection.cursor() as cursor:
+        cursor.execute(DELETE_ORPHANS_SQL, {'lo': lo, 'hi': hi})
+        cursor.execute(REBUILD_SQL, {'lo': lo, 'hi': hi})
+        return cursor.rowcount
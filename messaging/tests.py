@@ -1,3 +1,192 @@
-from django.test import TestCase
+import asyncio
+import json
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from users.models import CustomUser
+from .consumers import CLOSE_FORBIDDEN, websocket_application
+from .models import ConversationSummary, Message
+from .summaries import mark_conversation_read, rebuild_summaries, record_messages
+from .utils import get_or_create_conversation_id
+
+
+class SocketClient:
+    """Drives messaging.consumers directly through the ASGI interface."""
+
+    def __init__(self, conversation_id, session_key):
+        self.incoming = asyncio.Queue()
+        self.outgoing = asyncio.Queue()
+        scope = {
+            'type': 'websocket',
+            'path': f'/ws/messages/{conversation_id}/',
+            'headers': [(b'cookie', f'{settings.SESSION_COOKIE_NAME}={session_key}'.encode())],
+        }
+        self.task = asyncio.ensure_future(websocket_application(scope, self.incoming.get, self.outgoing.put))
+
+    async def connect(self):
+        await self.incoming.put({'type': 'websocket.connect'})
+        return await asyncio.wait_for(self.outgoing.get(), 5)
+
+    async def receive_json(self):
+        event = await asyncio.wait_for(self.outgoing.get(), 5)
+        return json.loads(event['text'])
+
+    async def send_json(self, data):
+        await self.incoming.put({'type': 'websocket.receive', 'text': json.dumps(data)})
+
+    async def disconnect(self):
+        await self.incoming.put({'type': 'websocket.disconnect', 'code': 1000})
+        await asyncio.wait_for(self.task, 5)
+
+
+class ChatSocketTests(TransactionTestCase):
+    def setUp(self):
+        self.buyer = CustomUser.objects.create_user(username='buyer', password='pass')
+        self.vendor = CustomUser.objects.create_user(username='vendor', password='pass', role='VENDOR')
+        self.outsider = CustomUser.objects.create_user(username='outsider', password='pass')
+        self.conversation_id = get_or_create_conversation_id(self.buyer, self.vendor)
+        self.sessions = {}
+        for user in (self.buyer, self.vendor, self.outsider):
+            # One client each: logging a second user into the same client
+            # flushes the first user's session
+            client = Client()
+            client.force_login(user)
+            self.sessions[user] = client.cookies[settings.SESSION_COOKIE_NAME].value
+
+    async def test_participants_receive_new_messages(self):
+        buyer = SocketClient(self.conversation_id, self.sessions[self.buyer])
+        vendor = SocketClient(self.conversation_id, self.sessions[self.vendor])
+        self.assertEqual((await buyer.connect())['type'], 'websocket.accept')
+        self.assertEqual((await vendor.connect())['type'], 'websocket.accept')
+
+        message = await sync_to_async(Message.objects.create)(
+            conversation_id=self.conversation_id, sender=self.buyer, text_content='Is the rice in stock?',
+        )
+
+        for socket, outgoing in ((buyer, True), (vendor, False)):
+            event = await socket.receive_json()
+            self.assertEqual(event['type'], 'message')
+            self.assertEqual(event['message']['id'], message.pk)
+            self.assertEqual(event['message']['is_outgoing'], outgoing)
+        await buyer.disconnect()
+        await vendor.disconnect()
+
+    async def test_read_frame_moves_watermark_and_notifies_sender(self):
+        buyer = SocketClient(self.conversation_id, self.sessions[self.buyer])
+        vendor = SocketClient(self.conversation_id, self.sessions[self.vendor])
+        await buyer.connect()
+        await vendor.connect()
+        message = await sync_to_async(Message.objects.create)(
+            conversation_id=self.conversation_id, sender=self.buyer, text_content='Hello',
+        )
+        await buyer.receive_json()
+        await vendor.receive_json()
+
+        await vendor.send_json({'type': 'read'})
+
+        self.assertEqual(await buyer.receive_json(), {'type': 'read', 'user_id': self.vendor.pk})
+        summary = await ConversationSummary.objects.aget(conversation_id=self.conversation_id, user=self.vendor)
+        self.assertEqual((summary.last_read_message_id, summary.unread_count), (message.pk, 0))
+        await buyer.disconnect()
+        await vendor.disconnect()
+
+    async def test_idle_socket_catches_up_on_unpublished_messages(self):
+        # bulk_create publishes nothing, like a message the worker writes
+        # while this process uses the in-process backend
+        buyer = SocketClient(self.conversation_id, self.sessions[self.buyer])
+        with mock.patch('messaging.consumers.CATCH_UP_SECONDS', 0.05):
+            await buyer.connect()
+            [receipt] = await sync_to_async(Message.objects.bulk_create)([
+                Message(conversation_id=self.conversation_id, sender=self.vendor, text_content='Order received'),
+            ])
+            event = await buyer.receive_json()
+            self.assertEqual((event['message']['id'], event['message']['is_outgoing']), (receipt.pk, False))
+            # Sent once, not on every catch-up
+            await asyncio.sleep(0.2)
+            self.assertTrue(buyer.outgoing.empty())
+            await buyer.disconnect()
+
+    async def test_outsiders_are_refused(self):
+        outsider = SocketClient(self.conversation_id, self.sessions[self.outsider])
+        self.assertEqual(await outsider.connect(), {'type': 'websocket.close', 'code': CLOSE_FORBIDDEN})
+        anonymous = SocketClient(self.conversation_id, 'no-such-session')
+        self.assertEqual(await anonymous.connect(), {'type': 'websocket.close', 'code': CLOSE_FORBIDDEN})
+
+
+class ConversationSummaryTests(TestCase):
+    def setUp(self):
+        self.buyer = CustomUser.objects.create_user(username='buyer', password='pass')
+        self.vendor = CustomUser.objects.create_user(username='vendor', password='pass', role='VENDOR')
+        self.conversation_id = get_or_create_conversation_id(self.buyer, self.vendor)
+
+    def send(self, sender, text):
+        return Message.objects.create(conversation_id=self.conversation_id, sender=sender, text_content=text)
+
+    def summary(self, user):
+        return ConversationSummary.objects.get(conversation_id=self.conversation_id, user=user)
+
+    def snapshot(self):
+        return sorted(ConversationSummary.objects.values_list(
+            'conversation_id', 'user_id', 'last_message_id', 'last_message_at', 'unread_count', 'last_read_message_id',
+        ))
+
+    def test_only_other_participants_unread_count_grows(self):
+        self.send(self.buyer, 'Is the rice in stock?')
+        self.send(self.buyer, 'I need 5kg')
+        reply = self.send(self.vendor, 'Yes, 10kg left')
+
+        buyer, vendor = self.summary(self.buyer), self.summary(self.vendor)
+        self.assertEqual((buyer.unread_count, vendor.unread_count), (1, 2))
+        self.assertEqual((buyer.last_message_id, vendor.last_message_id), (reply.pk, reply.pk))
+
+    def test_batches_count_once_per_message(self):
+        messages = Message.objects.bulk_create([
+            Message(conversation_id=self.conversation_id, sender=self.buyer, text_content=f'Line {i}') for i in range(3)
+        ])
+        record_messages(message.pk for message in messages)
+        self.assertEqual(self.summary(self.vendor).unread_count, 3)
+        self.assertEqual(self.summary(self.vendor).last_message_id, max(message.pk for message in messages))
+
+    def test_last_message_never_moves_backwards(self):
+        newest = self.send(self.buyer, 'Newest')
+        # A message recorded late, e.g. a receipt from a slow job
+        late = Message.objects.bulk_create([
+            Message(conversation_id=self.conversation_id, sender=self.vendor, text_content='Older'),
+        ])[0]
+        Message.objects.filter(pk=late.pk).update(timestamp=newest.timestamp - timedelta(minutes=5))
+        record_messages([late.pk])
+
+        for user in (self.buyer, self.vendor):
+            summary = self.summary(user)
+            self.assertEqual((summary.last_message_id, summary.last_message_at), (newest.pk, newest.timestamp))
+        self.assertEqual(self.summary(self.buyer).unread_count, 1)
+
+    def test_rebuild_matches_incremental_upkeep_and_keeps_watermarks(self):
+        self.send(self.buyer, 'Hello')
+        self.send(self.vendor, 'Hi, what do you need?')
+        mark_conversation_read(self.conversation_id, self.vendor.pk)
+        self.send(self.buyer, 'Eggs, please')
+        self.send(self.buyer, 'Two trays')
+        expected = self.snapshot()
+        self.assertEqual(self.summary(self.vendor).unread_count, 2)
+
+        ConversationSummary.objects.update(unread_count=99, last_message=None)
+        with transaction.atomic():
+            rebuild_summaries(self.conversation_id, self.conversation_id + 1)
+        self.assertEqual(self.snapshot(), expected)
+
+    def test_message_is_not_saved_without_its_summary(self):
+        self.client.force_login(self.buyer)
+        with mock.patch('messaging.signals.record_messages', side_effect=DatabaseError('summary upsert failed')):
+            with self.assertRaises(DatabaseError), self.assertLogs('django.request', 'ERROR'):
+                self.client.post(
+                    reverse('conversation_detail', kwargs={'conversation_id': self.conversation_id}),
+                    {'text_content': 'Is the rice in stock?'},
+                )
+        self.assertFalse(Message.objects.exists())
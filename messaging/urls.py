@@ -8,6 +8,9 @@ urlpatterns = [
     
     # /messages/1/ (where 1 is the conversation ID)
     path('<int:conversation_id>/', views.conversation_detail_view, name='conversation_detail'),
+
+    # /messages/1/history/?cursor=... (older messages, JSON)
+    path('<int:conversation_id>/history/', views.message_history_api, name='message_history_api'),
     
     # /messages/start/2/ (This uses the existing, correct view function)
     path('start/<int:recipient_id>/', views.start_conversation_view, name='start_conversation'),
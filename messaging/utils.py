@@ -0,0 +1,141 @@
+# messaging/utils.py
+from django.db.models import OuterRef, Subquery
+from django.utils.formats import date_format
+from django.utils.timezone import localtime
+from sarisari_project.pagination import keyset_page
+from users.models import CustomUser
+from .fanout import publish
+from .models import Conversation, ConversationSummary, Message
+from .summaries import add_participants
+
+
+def pair_key(user_id, other_id):
+    """Canonical key of the one-to-one conversation between two users."""
+    low, high = sorted((int(user_id), int(other_id)))
+    return f'{low}:{high}'
+
+
+def get_or_create_conversations(user, other_ids):
+    """
+    Map each id in `other_ids` to the id of its one-to-one conversation with
+    `user`, creating the missing ones. Existing conversations come from one
+    lookup on the unique pair_key index, so the query count does not depend
+    on how many users are passed.
+    """
+    Participant = Conversation.participants.through
+    keys = {pair_key(user.pk, other_id): int(other_id) for other_id in other_ids if int(other_id) != user.pk}
+    if not keys:
+        return {}
+
+    conversation_ids = {
+        keys[key]: conversation_id
+        for key, conversation_id in Conversation.objects.filter(pair_key__in=keys).values_list('pair_key', 'id')
+    }
+
+    missing = sorted(key for key, other_id in keys.items() if other_id not in conversation_ids)
+    if missing:
+        # A concurrent request may create the same pair in the meantime; the
+        # upsert then returns that row's id instead of inserting a duplicate.
+        created = Conversation.objects.bulk_create(
+            [Conversation(pair_key=key) for key in missing],
+            update_conflicts=True, unique_fields=['pair_key'], update_fields=['pair_key'],
+        )
+        members = [
+            (conversation.pk, participant_id)
+            for key, conversation in zip(missing, created)
+            for participant_id in (user.pk, keys[key])
+        ]
+        Participant.objects.bulk_create([
+            Participant(conversation_id=conversation_id, customuser_id=participant_id)
+            for conversation_id, participant_id in members
+        ], ignore_conflicts=True)
+        add_participants(members)
+        conversation_ids.update((keys[key], conversation.pk) for key, conversation in zip(missing, created))
+    return conversation_ids
+
+
+def get_or_create_conversation_id(user, other):
+    """Id of the one-to-one Conversation between `user` and `other`."""
+    return get_or_create_conversations(user, [other.pk])[other.pk]
+
+
+INBOX_PAGE_SIZE = 30
+INBOX_ORDERING = ('-last_message_at', '-id')
+
+
+def inbox_page(user, cursor=None, limit=INBOX_PAGE_SIZE):
+    """
+    One page of the inbox as ((conversation, other_user, last_message,
+    unread_count), ...) rows plus the next cursor. Reads only the user's
+    ConversationSummary rows (via their recency index) and the other
+    participants: two queries in total.
+    """
+    Participant = Conversation.participants.through
+    other = Participant.objects.filter(
+        conversation_id=OuterRef('conversation_id'),
+    ).exclude(customuser_id=user.pk).order_by('customuser_id')
+    summaries = ConversationSummary.objects.filter(user=user).select_related(
+        'conversation', 'last_message',
+    ).annotate(other_id=Subquery(other.values('customuser_id')[:1]))
+
+    summaries, next_cursor = keyset_page(summaries, INBOX_ORDERING, cursor=cursor, limit=limit)
+    others = CustomUser.objects.in_bulk({s.other_id for s in summaries if s.other_id})
+    rows = [
+        (s.conversation, others.get(s.other_id), s.last_message, s.unread_count)
+        for s in summaries
+    ]
+    return rows, next_cursor
+
+
+CHAT_PAGE_SIZE = 50
+# Newest first so the keyset cursor walks back in time
+HISTORY_ORDERING = ('-timestamp', '-id')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def message_history_page(conversation_id, cursor=None, limit=CHAT_PAGE_SIZE):
+    """
+    The `limit` visible messages before `cursor` (or the newest ones), in
+    chronological order, and the cursor for the page before them.
+    """
+    messages = Message.objects.filter(
+        conversation_id=conversation_id, is_moderator_deleted=False,
+    ).select_related('sender')
+    rows, older_cursor = keyset_page(messages, HISTORY_ORDERING, cursor=cursor, limit=limit)
+    rows.reverse()
+    return rows, older_cursor
+
+
+def serialize_message(message, user):
+    media_url = message.media_file.url if message.media_file else None
+    return {
+        'id': message.pk,
+        'sender_id': message.sender_id,
+        'is_outgoing': message.sender_id == user.pk,
+        'sender_avatar_url': message.sender.avatar.url if message.sender.avatar else None,
+        'text_content': message.text_content or '',
+        'media_url': media_url,
+        'media_is_image': bool(media_url) and media_url.lower().split('?')[0].endswith(IMAGE_EXTENSIONS),
+        'timestamp': message.timestamp.isoformat(),
+        'time_display': date_format(localtime(message.timestamp), 'g:i A'),
+    }
+
+
+# Live chat events (see messaging.consumers), sent after the transaction commits
+
+def publish_messages(messages):
+    for message in messages:
+        # is_outgoing is set per socket by the consumer
+        publish(message.conversation_id, {'type': 'message', 'message': serialize_message(message, message.sender)})
+
+
+def publish_read(conversation_id, user_id):
+    publish(conversation_id, {'type': 'read', 'user_id': user_id})
+
+
+def publish_messages_deleted(messages):
+    by_conversation = {}
+    for message in messages:
+        by_conversation.setdefault(message.conversation_id, []).append(message.pk)
+    for conversation_id, message_ids in by_conversation.items():
+        publish(conversation_id, {'type': 'message_deleted', 'message_ids': message_ids})
@@ -1,34 +1,39 @@
 # messaging/views.py
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.db.models import Count, Q
-from .models import Conversation, Message, MessageReport 
+from .models import Conversation, ConversationSummary, Message, MessageReport 
+from .summaries import mark_conversation_read
+from .utils import (
+    get_or_create_conversation_id, inbox_page, message_history_page, publish_read, serialize_message,
+)
+from sarisari_project.pagination import InvalidCursor
 from users.models import CustomUser, LoyaltyProfile
-from notifications.utils import create_notification
+from notifications.utils import mark_notifications_read, notify_coalesced
+from django.db import transaction
 from django.urls import reverse
 from notifications.models import Notification
 from django.http import JsonResponse, HttpResponseBadRequest 
 from django.views.decorators.http import require_POST 
-import datetime 
 
 MESSENGER_TEMPLATE = 'messaging/messenger.html'
 
+
+def inbox_context(request):
+    """Sidebar context shared by the inbox and conversation pages (?cursor= pages it)."""
+    try:
+        rows, next_cursor = inbox_page(request.user, cursor=request.GET.get('cursor'))
+    except InvalidCursor:
+        rows, next_cursor = inbox_page(request.user)
+    return {
+        'conversations_with_recipient': rows,
+        'inbox_next_cursor': next_cursor,
+    }
+
+
 @login_required
 def inbox_view(request):
-    all_conversations = Conversation.objects.filter(participants=request.user).prefetch_related('participants', 'messages')
-    
-    conversations_with_recipient = []
-    for convo in all_conversations:
-        recipient = convo.participants.exclude(id=request.user.id).first()
-        last_message = convo.messages.all().order_by('-timestamp').first() 
-        unread_count = convo.messages.filter(Q(is_read=False) & ~Q(sender=request.user)).count()
-        conversations_with_recipient.append((convo, recipient, last_message, unread_count))
-    
-    epoch = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
-    conversations_with_recipient.sort(key=lambda x: x[2].timestamp if x[2] else epoch, reverse=True)
-
     context = {
-        'conversations_with_recipient': conversations_with_recipient,
+        **inbox_context(request),
         'other_participant': None,
     }
     return render(request, MESSENGER_TEMPLATE, context)
@@ -46,16 +51,16 @@ def conversation_detail_view(request, conversation_id):
         media_file = request.FILES.get('media_file')
         
         if text_content or media_file:
-            # Create the message
-            new_message = Message.objects.create(
-                conversation=conversation,
-                sender=request.user,
-                text_content=text_content
-            )
-            
-            if media_file:
-                new_message.media_file = media_file
-                new_message.save()
+            # Create the message (with its attachment, so the live event carries it).
+            # Atomic so the message and its inbox summaries (the post_save
+            # upsert) are written together or not at all.
+            with transaction.atomic():
+                new_message = Message.objects.create(
+                    conversation=conversation,
+                    sender=request.user,
+                    text_content=text_content,
+                    media_file=media_file,
+                )
 
             # ===== LOYALTY POINTS LOGIC =====
             loyalty, _ = LoyaltyProfile.objects.get_or_create(user=request.user)
@@ -70,46 +75,56 @@ def conversation_detail_view(request, conversation_id):
             if recipient:
                 notification_text = f"New message from {request.user.username}"
                 notification_link = reverse('conversation_detail', kwargs={'conversation_id': conversation.id})
-                create_notification(
-                    recipient=recipient,
-                    message=notification_text,
-                    link=notification_link
+                # Folded into the recipient's unread notification for this chat, if any
+                notify_coalesced(
+                    recipient,
+                    Notification.Kind.CHAT_MESSAGE,
+                    f'conversation:{conversation.id}',
+                    notification_text,
+                    link=notification_link,
                 )
+
+            # Sent from the chat window's fetch(): no need to re-render the page
+            if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+                return JsonResponse({'status': 'success', 'message': serialize_message(new_message, request.user)})
+        elif request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+            return JsonResponse({'status': 'error', 'message': 'Type a message or attach a file.'}, status=400)
         return redirect('conversation_detail', conversation_id=conversation.id)
 
     # --- GET Request Logic (unchanged) ---
     conversation_url = reverse('conversation_detail', kwargs={'conversation_id': conversation.id})
-    Notification.objects.filter(
-        recipient=request.user, 
-        is_read=False, 
-        link=conversation_url
-    ).update(is_read=True)
-
-    messages = conversation.messages.filter(is_moderator_deleted=False).order_by('timestamp')
-    messages.filter(conversation=conversation).exclude(sender=request.user).update(is_read=True)
-    other_participant = conversation.participants.exclude(id=request.user.id).first()
+    mark_notifications_read(request.user.pk, link=conversation_url)
 
-    all_conversations = Conversation.objects.filter(participants=request.user).prefetch_related('participants', 'messages')
-    
-    conversations_with_recipient = []
-    for convo in all_conversations:
-        recipient = convo.participants.exclude(id=request.user.id).first()
-        last_message = convo.messages.all().order_by('-timestamp').first()
-        unread_count = convo.messages.filter(Q(is_read=False) & ~Q(sender=request.user)).count()
-        conversations_with_recipient.append((convo, recipient, last_message, unread_count))
-    
-    epoch = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
-    conversations_with_recipient.sort(key=lambda x: x[2].timestamp if x[2] else epoch, reverse=True)
+    # Only the newest page is rendered; older pages come from message_history_api
+    messages, older_cursor = message_history_page(conversation.id)
+    if mark_conversation_read(conversation.id, request.user.id):
+        publish_read(conversation.id, request.user.id)
+    other_participant = conversation.participants.exclude(id=request.user.id).first()
 
     context = {
-        'conversations_with_recipient': conversations_with_recipient,
+        **inbox_context(request),
         'conversation': conversation,
         'chat_messages': messages,
+        'older_cursor': older_cursor,
         'other_participant': other_participant
     }
     
     return render(request, MESSENGER_TEMPLATE, context)
 
+@login_required
+def message_history_api(request, conversation_id):
+    """Older messages of a conversation, before ?cursor=, for "load older" in the chat window."""
+    if not ConversationSummary.objects.filter(conversation_id=conversation_id, user=request.user).exists():
+        return JsonResponse({'error': 'Conversation not found'}, status=404)
+    try:
+        messages, older_cursor = message_history_page(conversation_id, cursor=request.GET.get('cursor'))
+    except InvalidCursor as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse({
+        'messages': [serialize_message(message, request.user) for message in messages],
+        'next_cursor': older_cursor,
+    })
+
 # Report message view (unchanged)
 @login_required
 @require_POST
@@ -143,18 +158,6 @@ def start_conversation_view(request, recipient_id):
     if recipient == request.user:
         return redirect('home') 
 
-    conversation = Conversation.objects.annotate(
-        num_participants=Count('participants')
-    ).filter(
-        participants=request.user
-    ).filter(
-        participants=recipient
-    ).filter(
-        num_participants=2
-    ).first()
-
-    if not conversation:
-        conversation = Conversation.objects.create()
-        conversation.participants.add(request.user, recipient)
-
-    return redirect('conversation_detail', conversation_id=conversation.id)
+    conversation_id = get_or_create_conversation_id(request.user, recipient)
+
+    return redirect('conversation_detail', conversation_id=conversation_id)
@@ -1,9 +1,15 @@
 # notifications/context_processors.py
-from .models import Notification
+from django.utils.functional import SimpleLazyObject
+from .counters import unread_count
+
 
 def unread_notifications(request):
+    """
+    The navbar badge count as a lazy value: nothing is looked up unless a
+    template uses it, and then it is one cache read (no query on a hit) or,
+    without a shared cache, one primary-key lookup.
+    """
     if request.user.is_authenticated:
-        # Fetch all notifications for the user that are not read
-        notifications = request.user.notifications.filter(is_read=False)
-        return {'unread_notifications': notifications}
-    return {}
\ No newline at end of file
+        user_id = request.user.pk
+        return {'unread_notification_count': SimpleLazyObject(lambda: unread_count(user_id))}
+    return {}
@@ -0,0 +1,84 @@
+# notifications/counters.py
+"""
+Per-user unread notification counts for the navbar badge.
+
+The count lives in NotificationCounter (updated in the same transaction as
+the notifications themselves). With a cache every process shares (Redis) it
+is mirrored there, so rendering a page costs no query on a hit. The cache
+copy is adjusted after commit with incr/decr; a miss reloads it from the
+counter row. The TTL bounds how long a fill racing a concurrent change can
+leave the copy off by one.
+
+A per-process LocMemCache (no REDIS_URL) is not used: the worker's changes
+would only adjust the worker's copy, so the count is read from the counter
+row instead, a primary-key lookup.
+"""
+from collections import Counter
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from .models import NotificationCounter
+
+UNREAD_TTL = 60 * 60  # seconds
+COUNTER_TABLE = NotificationCounter._meta.db_table
+
+ADD_UNREAD_SQL = f"""
+    INSERT INTO {COUNTER_TABLE} (user_id, unread_count)
+    SELECT * FROM unnest(%s::bigint[], %s::integer[])
+    ON CONFLICT (user_id) DO UPDATE SET unread_count = {COUNTER_TABLE}.unread_count + EXCLUDED.unread_count
+"""
+
+
+def unread_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def cache_is_shared():
+    return not isinstance(caches['default'], LocMemCache)
+
+
+def stored_unread_count(user_id):
+    return NotificationCounter.objects.filter(user_id=user_id).values_list('unread_count', flat=True).first() or 0
+
+
+def unread_count(user_id):
+    if not cache_is_shared():
+        return stored_unread_count(user_id)
+    count = cache.get(unread_key(user_id))
+    if count is None:
+        count = stored_unread_count(user_id)
+        cache.add(unread_key(user_id), count, UNREAD_TTL)
+    return count
+
+
+def adjust_cached_unread(user_id, delta):
+    """Apply a committed change to the cached copy, if there is one."""
+    if not cache_is_shared():
+        return
+    try:
+        if cache.incr(unread_key(user_id), delta) < 0:
+            cache.delete(unread_key(user_id))
+    except ValueError:
+        pass  # not cached; the next read loads the counter row
+
+
+def add_unread(recipient_ids):
+    """Count one new unread notification per entry of `recipient_ids` (repeats allowed)."""
+    counts = Counter(recipient_ids)
+    if not counts:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(ADD_UNREAD_SQL, [list(counts), list(counts.values())])
+    transaction.on_commit(lambda: [adjust_cached_unread(user_id, n) for user_id, n in counts.items()])
+
+
+def remove_unread(user_id, n):
+    """`n` of the user's notifications were read or deleted."""
+    if n <= 0:
+        return
+    NotificationCounter.objects.filter(user_id=user_id).update(unread_count=Greatest(F('unread_count') - n, 0))
+    transaction.on_commit(lambda: adjust_cached_unread(user_id, -n))
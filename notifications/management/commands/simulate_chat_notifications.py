@@ -0,0 +1,78 @@
+# notifications/management/commands/simulate_chat_notifications.py
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from notifications.models import Notification
+from notifications.utils import create_notification, mark_notifications_read, notify_coalesced
+from users.models import CustomUser
+
+
+def chat_events(rng, conversations, messages, read_rate):
+    """A reproducible stream of ('message' | 'read', conversation index) events."""
+    for _ in range(messages):
+        conversation = rng.randrange(conversations)
+        yield 'message', conversation
+        # Sometimes the recipient opens the chat, which reads its notifications
+        if rng.random() < read_rate:
+            yield 'read', conversation
+
+
+def legacy_notify(recipient, target, message):
+    """What conversation_detail_view did before coalescing: one row per message."""
+    create_notification(recipient, message, link=f'/messages/{target}/')
+
+
+def coalesced_notify(recipient, target, message):
+    notify_coalesced(recipient, Notification.Kind.CHAT_MESSAGE, target, message, link=f'/messages/{target}/')
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a simulated chat workload through the legacy one-row-per-message "
+        "notification path and through notify_coalesced, and compare how many "
+        "notification rows each writes (seeded users, rolled back afterwards)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--conversations', type=int, default=200, help='Number of simulated conversations.')
+        parser.add_argument('--messages', type=int, default=5000, help='Messages sent across all conversations.')
+        parser.add_argument('--read-rate', type=float, default=0.1,
+                            help='Chance the recipient reads the chat after each message.')
+        parser.add_argument('--seed', type=int, default=327, help='Random seed for the workload.')
+
+    def handle(self, *args, **options):
+        results = {}
+        with transaction.atomic():
+            self.stdout.write(f"Seeding {options['conversations']} recipients...")
+            CustomUser.objects.bulk_create([
+                CustomUser(username=f'sim-chat-{i}', password='!') for i in range(options['conversations'])
+            ])
+            recipients = list(CustomUser.objects.filter(username__startswith='sim-chat-').order_by('pk'))
+            notifications = Notification.objects.filter(recipient__in=recipients)
+
+            for label, notify in (('legacy', legacy_notify), ('coalesced', coalesced_notify)):
+                # Both paths replay the same events
+                events = chat_events(
+                    random.Random(options['seed']), len(recipients), options['messages'], options['read_rate'],
+                )
+                start = time.perf_counter()
+                for action, index in events:
+                    recipient, target = recipients[index], f'conversation:{index}'
+                    if action == 'message':
+                        notify(recipient, target, 'New message from sim-buyer')
+                    else:
+                        mark_notifications_read(recipient.pk, link=f'/messages/{target}/')
+                elapsed = time.perf_counter() - start
+                results[label] = (notifications.count(), notifications.filter(is_read=False).count(), elapsed)
+                notifications.delete()
+
+            transaction.set_rollback(True)
+
+        for label, (rows, unread, elapsed) in results.items():
+            self.stdout.write(f"{label:<10} {rows:>8} rows  {unread:>6} unread  {elapsed * 1000:8.1f} ms")
+        legacy_rows, coalesced_rows = results['legacy'][0], results['coalesced'][0]
+        reduction = 100 * (1 - coalesced_rows / legacy_rows) if legacy_rows else 0
+        self.stdout.write(self.style.SUCCESS(f"Notification rows written: {reduction:.1f}% fewer with coalescing"))
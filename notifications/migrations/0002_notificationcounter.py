@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-17 21:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Seed the counters from the notifications that are unread today
+BACKFILL_COUNTERS = """
+    INSERT INTO notifications_notificationcounter (user_id, unread_count)
+    SELECT recipient_id, COUNT(*) FROM notifications_notification
+     WHERE NOT is_read
+     GROUP BY recipient_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+        ('users', '0018_vendorprofile_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunSQL(BACKFILL_COUNTERS, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-17 21:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_notificationcounter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='kind',
+            field=models.CharField(blank=True, choices=[('', 'General'), ('chat_message', 'Chat message')], default='', max_length=32),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='target',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_read', False), models.Q(('kind', ''), _negated=True)), fields=('recipient', 'kind', 'target'), name='notification_unread_coalesce_uniq'),
+        ),
+    ]
@@ -3,6 +3,12 @@ from django.db import models
 from users.models import CustomUser
 
 class Notification(models.Model):
+    class Kind(models.TextChoices):
+        # One row per event
+        GENERAL = "", "General"
+        # Coalesced: one unread row per recipient and conversation
+        CHAT_MESSAGE = "chat_message", "Chat message"
+
     recipient = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='notifications')
     message = models.CharField(max_length=255)
     is_read = models.BooleanField(default=False)
@@ -10,8 +16,37 @@ class Notification(models.Model):
     # A generic link to where the notification should take the user
     link = models.URLField(blank=True, null=True)
 
+    # Coalescing (see notifications.utils.notify_coalesced): while unread, a
+    # row of a non-general kind absorbs repeats for the same target, which
+    # bump `count` and `timestamp` instead of inserting a new row.
+    kind = models.CharField(max_length=32, choices=Kind.choices, default=Kind.GENERAL, blank=True)
+    target = models.CharField(max_length=64, blank=True, default='')
+    count = models.PositiveIntegerField(default=1)
+
     def __str__(self):
         return f"Notification for {self.recipient.username}: {self.message}"
 
+    @property
+    def display_message(self):
+        return self.message if self.count == 1 else f"{self.message} ({self.count})"
+
     class Meta:
-        ordering = ['-timestamp'] # Show newest notifications first
\ No newline at end of file
+        ordering = ['-timestamp'] # Show newest notifications first
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipient', 'kind', 'target'],
+                condition=models.Q(is_read=False) & ~models.Q(kind=''),
+                name='notification_unread_coalesce_uniq',
+            ),
+        ]
+
+class NotificationCounter(models.Model):
+    """
+    Unread notifications per user, kept by notifications.counters so the
+    navbar badge never counts notification rows. The cache holds a copy.
+    """
+    user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, primary_key=True, related_name='notification_counter')
+    unread_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.unread_count} unread notification(s) for user {self.user_id}"
@@ -0,0 +1,21 @@
+# notifications/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .counters import add_unread, remove_unread
+from .models import Notification
+from .utils import notifications_changed
+
+
+@receiver(post_save, sender=Notification)
+def notification_saved(sender, instance, created, **kwargs):
+    """bulk_create() and update() skip these; see notifications_created() and remove_unread()."""
+    if created and not instance.is_read:
+        add_unread([instance.recipient_id])
+    notifications_changed([instance.recipient_id])
+
+
+@receiver(post_delete, sender=Notification)
+def notification_deleted(sender, instance, **kwargs):
+    if not instance.is_read:
+        remove_unread(instance.recipient_id, 1)
+    notifications_changed([instance.recipient_id])
@@ -0,0 +1,9 @@
+# notifications/tasks.py
+from jobs.utils import task
+from .utils import create_notifications
+
+
+@task()
+def notify_users(recipient_ids, message, link=None):
+    """Send the same notification to many users with a single INSERT."""
+    create_notifications(recipient_ids, message, link)
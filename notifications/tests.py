@@ -1,3 +1,234 @@
-from django.test import TestCase
+import json
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from messaging.fanout import get_backend
+from users.models import CustomUser
+from .context_processors import unread_notifications
+from .counters import unread_count
+from .models import Notification, NotificationCounter
+from .tasks import notify_users
+from .utils import (
+    NotificationBatch, batched, create_notification, create_notifications, mark_notifications_read, notification_group,
+    notify_coalesced,
+)
+from .views import STREAM_RETRY_MS, notification_events, resume_after
+
+
+def parse_event(frame):
+    fields = dict(line.split(': ', 1) for line in frame.strip().splitlines())
+    return fields['event'], fields.get('id'), json.loads(fields['data'])
+
+
+class NotificationStreamTests(TransactionTestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='shopper', password='pass')
+        self.notifications = [
+            Notification.objects.create(recipient=self.user, message=f'Notification {i}') for i in range(3)
+        ]
+        # Distinct, ordered timestamps: the stream's event ids
+        start = timezone.now() - timedelta(minutes=5)
+        for i, notification in enumerate(self.notifications):
+            notification.timestamp = start + timedelta(minutes=i)
+            notification.save(update_fields=['timestamp'])
+        self.async_client.force_login(self.user)
+
+    async def first_event(self, after=None):
+        """The first event of a stream, which is then closed the way Django closes it on disconnect."""
+        events = notification_events(self.user.pk, after)
+        group = notification_group(self.user.pk)
+        try:
+            self.assertEqual(await anext(events), f'retry: {STREAM_RETRY_MS}\n\n')
+            self.assertEqual(get_backend().subscriber_count(group), 1)
+            return parse_event(await anext(events))
+        finally:
+            await events.aclose()
+            self.assertEqual(get_backend().subscriber_count(group), 0)
+
+    async def test_first_connection_gets_a_snapshot(self):
+        kind, event_id, data = await self.first_event()
+        self.assertEqual(kind, 'snapshot')
+        self.assertEqual(event_id, self.notifications[-1].timestamp.isoformat())
+        self.assertEqual([n['id'] for n in data['notifications']], [n.pk for n in reversed(self.notifications)])
+        self.assertEqual(data['unread_count'], 3)
+
+    async def test_reconnect_resumes_after_last_event_id(self):
+        request = RequestFactory().get('/', headers={'Last-Event-ID': self.notifications[1].timestamp.isoformat()})
+        kind, event_id, data = await self.first_event(resume_after(request))
+        self.assertEqual(kind, 'update')
+        self.assertEqual([n['id'] for n in data['notifications']], [self.notifications[2].pk])
+        self.assertEqual(data['unread_count'], 3)
+
+    async def test_reconnect_sees_coalesced_notifications_again(self):
+        last_seen = self.notifications[2].timestamp
+        await sync_to_async(notify_coalesced)(self.user, Notification.Kind.CHAT_MESSAGE, 'conversation:1', 'New message')
+        await sync_to_async(notify_coalesced)(self.user, Notification.Kind.CHAT_MESSAGE, 'conversation:1', 'New message')
+        kind, event_id, data = await self.first_event(last_seen)
+        self.assertEqual(kind, 'update')
+        self.assertEqual([(n['message'], n['count']) for n in data['notifications']], [('New message (2)', 2)])
+        self.assertEqual(data['unread_count'], 4)
+
+    async def test_idle_stream_sees_changes_made_elsewhere(self):
+        # Nothing is published here, as when the worker writes with the
+        # in-process backend: the stream finds it at the next heartbeat
+        events = notification_events(self.user.pk, None)
+        try:
+            with mock.patch('notifications.views.STREAM_HEARTBEAT_SECONDS', 0.05):
+                await anext(events)  # retry
+                await anext(events)  # snapshot
+                with mock.patch('notifications.utils.publish_group'):
+                    receipt = await sync_to_async(Notification.objects.create)(recipient=self.user, message='Order placed')
+                self.assertEqual(await anext(events), ': keep-alive\n\n')
+                kind, event_id, data = parse_event(await anext(events))
+        finally:
+            await events.aclose()
+        self.assertEqual(kind, 'update')
+        self.assertEqual([n['id'] for n in data['notifications']], [receipt.pk])
+        self.assertEqual(data['unread_count'], 4)
+
+    def test_malformed_last_event_id_starts_over(self):
+        for last_id in ('42', 'yesterday', '2024-13-45T00:00:00'):
+            with self.subTest(last_id=last_id):
+                self.assertIsNone(resume_after(RequestFactory().get('/', {'last_id': last_id})))
+
+    async def test_stream_response(self):
+        # The body is not read here: first_event drives the generator itself
+        response = await self.async_client.get(reverse('notification_stream'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+
+    async def test_anonymous_users_are_refused(self):
+        await self.async_client.alogout()
+        response = await self.async_client.get(reverse('notification_stream'))
+        self.assertEqual(response.status_code, 401)
+
+
+class UnreadCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(username='shopper', password='pass')
+        self.other = CustomUser.objects.create_user(username='vendor', password='pass')
+
+    def test_counter_follows_creates_bulk_creates_and_reads(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Notification.objects.create(recipient=self.user, message='Order placed')
+            notify_users([self.user.pk, self.other.pk], 'Shop update')
+        self.assertEqual(unread_count(self.user.pk), 2)
+        self.assertEqual(unread_count(self.other.pk), 1)
+
+        self.client.force_login(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(reverse('notification_list'))
+        self.assertEqual(unread_count(self.user.pk), 0)
+        cache.clear()  # the counter row agrees with the cached copy
+        self.assertEqual(unread_count(self.user.pk), 0)
+        self.assertEqual(unread_count(self.other.pk), 1)
+
+    def test_bumps_do_not_depend_on_the_local_cache(self):
+        # The worker changes the counter row; this process's LocMemCache
+        # never hears of it
+        self.assertEqual(unread_count(self.user.pk), 0)
+        NotificationCounter.objects.create(user=self.user, unread_count=3)
+        self.assertEqual(unread_count(self.user.pk), 3)
+
+    def test_context_processor_is_lazy_and_free_on_a_cache_hit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Notification.objects.create(recipient=self.user, message='Order placed')
+        request = RequestFactory().get('/')
+        request.user = self.user
+
+        with self.assertNumQueries(0):
+            unread_notifications(request)  # nothing is looked up until a template uses it
+        with self.assertNumQueries(1):
+            self.assertEqual(unread_notifications(request)['unread_notification_count'], 1)
+
+        # A cache shared by every process, as Redis is
+        with tempfile.TemporaryDirectory() as location, self.settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location},
+        }):
+            unread_count(self.user.pk)  # warm the cache
+            with self.assertNumQueries(0):
+                self.assertEqual(unread_notifications(request)['unread_notification_count'], 1)
+            with self.captureOnCommitCallbacks(execute=True):
+                Notification.objects.create(recipient=self.user, message='Order shipped')
+            with self.assertNumQueries(0):
+                self.assertEqual(unread_count(self.user.pk), 2)
+
+
+class NotificationBatchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        CustomUser.objects.bulk_create([
+            CustomUser(username=f'user-{i}', password='!') for i in range(1000)
+        ])
+        self.users = list(CustomUser.objects.order_by('pk'))
+
+    def test_thousand_recipients_cost_one_insert(self):
+        # One INSERT for the notifications, one upsert for the unread counters
+        with self.assertNumQueries(2):
+            create_notifications(self.users, 'The market opens early tomorrow.')
+        self.assertEqual(Notification.objects.count(), 1000)
+
+    def test_nested_calls_are_written_when_the_outer_batch_exits(self):
+        with self.assertNumQueries(2):
+            with NotificationBatch():
+                for user in self.users[:10]:
+                    create_notification(user, 'Warning 1/2')
+                    create_notifications([user], 'Please review the guidelines.')
+        self.assertEqual(Notification.objects.count(), 20)
+
+    def test_batched_function_writes_once(self):
+        @batched
+        def suspend(user):
+            create_notification(user, 'Suspended for 2 days')
+            create_notification(user, '100 loyalty points have been deducted')
+
+        with self.assertNumQueries(2):
+            suspend(self.users[0])
+        self.assertEqual(Notification.objects.filter(recipient=self.users[0]).count(), 2)
+
+    def test_nothing_is_written_when_the_batch_fails(self):
+        with self.assertRaises(RuntimeError):
+            with NotificationBatch():
+                create_notifications(self.users[:5], 'Suspended')
+                raise RuntimeError
+        self.assertFalse(Notification.objects.exists())
+
+
+class CoalescingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(username='vendor', password='pass')
+
+    def notify(self, target='conversation:1'):
+        return notify_coalesced(self.user, Notification.Kind.CHAT_MESSAGE, target, 'New message from buyer')
+
+    def test_repeats_fold_into_one_unread_row(self):
+        first_id, inserted = self.notify()
+        self.assertTrue(inserted)
+        for _ in range(4):
+            self.assertEqual(self.notify(), (first_id, False))
+        notification = Notification.objects.get()
+        self.assertEqual(notification.count, 5)
+        self.assertEqual(notification.display_message, 'New message from buyer (5)')
+        self.assertEqual(unread_count(self.user.pk), 1)
+
+    def test_targets_and_read_rows_are_kept_apart(self):
+        self.notify()
+        self.notify('conversation:2')
+        self.assertEqual(mark_notifications_read(self.user.pk, target='conversation:1'), 1)
+        self.notify()
+        self.assertEqual(Notification.objects.count(), 3)
+        self.assertEqual(unread_count(self.user.pk), 2)
+
+    def test_general_notifications_never_coalesce(self):
+        create_notification(self.user, 'Order shipped')
+        create_notification(self.user, 'Order shipped')
+        self.assertEqual(Notification.objects.filter(count=1).count(), 2)
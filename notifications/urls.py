@@ -8,4 +8,7 @@ urlpatterns = [
     
     # New API URL
     path('api/recent/', views.recent_notifications_api, name='recent_notifications_api'),
+
+    # Live updates for the navbar bell (Server-Sent Events)
+    path('api/stream/', views.notification_stream, name='notification_stream'),
 ]
\ No newline at end of file
@@ -1,24 +1,187 @@
 # notifications/utils.py
+from contextvars import ContextVar
+from functools import wraps
+
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.timesince import timesince
+from messaging.fanout import publish_group
+from .counters import COUNTER_TABLE, add_unread, adjust_cached_unread, remove_unread
 from .models import Notification
 
+# Notifications shown in the navbar dropdown
+RECENT_LIMIT = 5
+
+
+def notification_group(user_id):
+    return f'notifications.{user_id}'
+
+
+def notifications_changed(user_ids):
+    """
+    Wake the open notification streams of these users (after commit) so
+    they send what changed. Needed wherever notifications are written
+    without a signal: bulk_create(), update().
+    """
+    for user_id in set(user_ids):
+        publish_group(notification_group(user_id), {'type': 'changed'})
+
+
+def notifications_created(notifications):
+    """Counter and stream upkeep for notifications saved with bulk_create()."""
+    add_unread(n.recipient_id for n in notifications if not n.is_read)
+    notifications_changed(n.recipient_id for n in notifications)
+
+
+def mark_notifications_read(user_id, **filters):
+    """Mark the user's unread notifications matching `filters` as read; returns how many."""
+    read = Notification.objects.filter(recipient_id=user_id, is_read=False, **filters).update(is_read=True)
+    if read:
+        remove_unread(user_id, read)
+        notifications_changed([user_id])
+    return read
+
+
+def serialize_notification(n):
+    return {
+        'id': n.id,
+        'message': n.display_message,
+        'count': n.count,
+        'link': n.link if n.link else '#',
+        'is_read': n.is_read,
+        'timestamp': n.timestamp.isoformat(),
+        'time_since': timesince(n.timestamp).split(',')[0] + " ago" # simplified time
+    }
+
+
+# The NotificationBatch open in this thread/task, if any
+_active_batch = ContextVar('notification_batch', default=None)
+
+
+class NotificationBatch:
+    """
+    Collects notifications and writes them with a single bulk_create() when
+    the outermost batch exits without an error. Batches nest, and
+    create_notification()/create_notifications() calls made while one is
+    open (even deep inside helpers like apply_suspension) join it.
+
+    Inside transaction.atomic() the write belongs to that transaction, so
+    a rollback drops the notifications with everything else.
+
+        with transaction.atomic(), NotificationBatch():
+            for user in users:
+                apply_suspension(user)
+    """
+    def __init__(self):
+        self.notifications = []
+        self._outer = None
+        self._token = None
+
+    def add(self, recipient, message, link=None):
+        batch = self._outer or self
+        batch.notifications.append(
+            Notification(recipient_id=getattr(recipient, 'pk', recipient), message=message, link=link)
+        )
+
+    def __enter__(self):
+        self._outer = _active_batch.get()
+        if self._outer is None:
+            self._token = _active_batch.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._outer is not None:
+            return False  # the outermost batch writes
+        _active_batch.reset(self._token)
+        if exc_type is None:
+            self.flush()
+        return False
+
+    def flush(self):
+        notifications, self.notifications = self.notifications, []
+        if notifications:
+            notifications_created(Notification.objects.bulk_create(notifications))
+
+
+def batched(func):
+    """Decorator: everything `func` notifies is written as one NotificationBatch."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with NotificationBatch():
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def create_notifications(recipients, message, link=None):
+    """
+    Send the same notification to many users (instances or ids): one
+    INSERT however many there are, or part of the open NotificationBatch.
+    """
+    with NotificationBatch() as batch:
+        for recipient in recipients:
+            batch.add(recipient, message, link)
+
+
 def create_notification(recipient, message, link=None):
     """
     A simple helper function to create a new notification.
     The link should be the URL path, e.g., /messages/1/
     """
-    Notification.objects.create(
-        recipient=recipient,
-        message=message,
-        link=link
-    )
+    create_notifications([recipient], message, link)
 
 def create_moderation_warning(recipient, message_content_snippet):
     """
     Helper function for moderation warnings.
     """
     # Create a notification that the reported user will see in their notification list
-    Notification.objects.create(
+    create_notification(
         recipient=recipient,
         message=f"Warning: Your message, '{message_content_snippet}', was flagged for inappropriate content.",
         link=None
-    )
\ No newline at end of file
+    )
+
+
+NOTIFICATION_TABLE = Notification._meta.db_table
+
+# Insert, or fold into the recipient's unread notification with the same kind
+# and target (bumping its count and moving it to the top), in one statement
+# that is safe under concurrent sends: the partial unique index
+# notification_unread_coalesce_uniq serializes them. xmax = 0 tells a fresh
+# insert from an update; only inserts add to the unread counter.
+COALESCE_SQL = f"""
+    WITH upserted AS (
+        INSERT INTO {NOTIFICATION_TABLE} AS n
+               ("recipient_id", "kind", "target", "message", "link", "count", "is_read", "timestamp")
+        VALUES (%(recipient_id)s, %(kind)s, %(target)s, %(message)s, %(link)s, 1, FALSE, %(now)s)
+        ON CONFLICT ("recipient_id", "kind", "target") WHERE NOT "is_read" AND NOT ("kind" = '')
+        DO UPDATE SET "count" = n."count" + 1,
+                      "timestamp" = EXCLUDED."timestamp",
+                      "message" = EXCLUDED."message",
+                      "link" = EXCLUDED."link"
+        RETURNING n."id", (n.xmax = 0) AS inserted
+    ), counted AS (
+        INSERT INTO {COUNTER_TABLE} AS c ("user_id", "unread_count")
+        SELECT %(recipient_id)s, 1 FROM upserted WHERE inserted
+        ON CONFLICT ("user_id") DO UPDATE SET "unread_count" = c."unread_count" + 1
+    )
+    SELECT "id", inserted FROM upserted
+"""
+
+
+def notify_coalesced(recipient, kind, target, message, link=None):
+    """
+    Notify `recipient` unless they already have an unread notification of
+    this kind for this target, in which case that one absorbs it (count + 1,
+    newest message and time). Returns (notification id, inserted).
+    """
+    user_id = getattr(recipient, 'pk', recipient)
+    with connection.cursor() as cursor:
+        cursor.execute(COALESCE_SQL, {
+            'recipient_id': user_id, 'kind': kind, 'target': target,
+            'message': message, 'link': link, 'now': timezone.now(),
+        })
+        notification_id, inserted = cursor.fetchone()
+    if inserted:
+        transaction.on_commit(lambda: adjust_cached_unread(user_id, 1))
+    notifications_changed([user_id])
+    return notification_id, inserted
@@ -1,11 +1,23 @@
 # notifications/views.py
+import asyncio
+
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from .utils import create_notification
+from messaging.fanout import OVERFLOW, get_backend
+from sarisari_project.streaming import database_sync_to_async, sse_event
+from .counters import unread_count as unread_count_for
+from .utils import (
+    RECENT_LIMIT, create_notification, mark_notifications_read, notification_group, serialize_notification,
+)
 from .models import Notification
-from django.http import JsonResponse
-from django.utils.timesince import timesince
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
+
+# Comment frames keep proxies from closing an idle stream
+STREAM_HEARTBEAT_SECONDS = 20
+# Browsers wait this long (ms) before reconnecting a dropped stream
+STREAM_RETRY_MS = 5000
 
 def test_notification_view(request):
     if request.user.is_authenticated:
@@ -24,7 +36,7 @@ def notification_list_view(request):
     """
     notifications = Notification.objects.filter(recipient=request.user).order_by('-timestamp')
     # We mark them as read when the user visits the full list page
-    notifications.filter(is_read=False).update(is_read=True)
+    mark_notifications_read(request.user.pk)
 
     context = {
         'notifications': notifications
@@ -38,20 +50,91 @@ def recent_notifications_api(request):
     API to return the 5 most recent notifications for the navbar dropdown.
     """
     # Get 5 most recent
-    recent = Notification.objects.filter(recipient=request.user).order_by('-timestamp')[:5]
-    unread_count = Notification.objects.filter(recipient=request.user, is_read=False).count()
-    
-    data = []
-    for n in recent:
-        data.append({
-            'id': n.id,
-            'message': n.message,
-            'link': n.link if n.link else '#',
-            'is_read': n.is_read,
-            'time_since': timesince(n.timestamp).split(',')[0] + " ago" # simplified time
-        })
+    recent = Notification.objects.filter(recipient=request.user).order_by('-timestamp')[:RECENT_LIMIT]
+    unread_count = unread_count_for(request.user.pk)
     
     return JsonResponse({
-        'notifications': data,
+        'notifications': [serialize_notification(n) for n in recent],
         'unread_count': unread_count
-    })
\ No newline at end of file
+    })
+
+
+@database_sync_to_async
+def stream_user_id(request):
+    return request.user.pk if request.user.is_authenticated else None
+
+
+@database_sync_to_async
+def notifications_after(user_id, after=None):
+    """
+    The notifications created or bumped (coalesced) after `after`, newest
+    first and at most RECENT_LIMIT, and the unread count.
+    """
+    recent = Notification.objects.filter(recipient_id=user_id)
+    if after is not None:
+        recent = recent.filter(timestamp__gt=after)
+    recent = [serialize_notification(n) for n in recent.order_by('-timestamp', '-id')[:RECENT_LIMIT]]
+    return recent, unread_count_for(user_id)
+
+
+async def notification_events(user_id, after):
+    """
+    A "snapshot" event (the dropdown's contents), or, when resuming, an
+    "update" with only what changed since `after`; then an "update" each
+    time the user's notifications change, or, for changes made by another
+    process, at the next heartbeat. Event ids are the timestamp of
+    the newest notification sent (coalescing moves a notification's
+    timestamp, not its id), so the browser resumes from the last one it saw.
+    """
+    async with get_backend().subscribe(notification_group(user_id)) as queue:
+        yield f'retry: {STREAM_RETRY_MS}\n\n'
+        kind = 'snapshot' if after is None else 'update'
+        last_id = after.isoformat() if after else None
+        sent_unread = None
+        while True:
+            recent, unread_count = await notifications_after(user_id, after)
+            if recent:
+                last_id = recent[0]['timestamp']
+                after = parse_datetime(last_id)
+            if kind == 'snapshot' or recent or unread_count != sent_unread:
+                yield sse_event(kind, {'notifications': recent, 'unread_count': unread_count}, last_id)
+                sent_unread = unread_count
+            kind = 'update'
+
+            try:
+                event = await asyncio.wait_for(queue.get(), STREAM_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # Look again anyway: with the in-process backend nothing the
+                # worker writes (receipts, order updates) is published here
+                yield ': keep-alive\n\n'
+                continue
+            # Several changes in a row are answered by one query
+            pending = [event]
+            while not queue.empty():
+                pending.append(queue.get_nowait())
+            if OVERFLOW in pending:
+                return  # the browser reconnects with Last-Event-ID
+
+
+def resume_after(request):
+    """The stream position a reconnecting client last saw, or None."""
+    last_id = request.headers.get('Last-Event-ID') or request.GET.get('last_id')
+    try:
+        return parse_datetime(last_id) if last_id else None
+    except ValueError:
+        return None
+
+
+async def notification_stream(request):
+    """
+    Server-Sent Events for the navbar bell. Async, so an idle stream costs
+    no worker thread; resumes from the Last-Event-ID header (sent by
+    EventSource on reconnect) or ?last_id=.
+    """
+    user_id = await stream_user_id(request)
+    if user_id is None:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    response = StreamingHttpResponse(notification_events(user_id, resume_after(request)), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # don't let a proxy buffer the stream
+    return response
\ No newline at end of file
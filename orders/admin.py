@@ -0,0 +1,19 @@
+# orders/admin.py
+from django.contrib import admin
+from .models import Checkout, Order, OrderLine
+
+
+class OrderLineInline(admin.TabularInline):
+    model = OrderLine
+    extra = 0
+    readonly_fields = ('product', 'name', 'unit_price', 'quantity')
+
+
+@admin.register(Order)
+class OrderAdmin(admin.ModelAdmin):
+    list_display = ('id', 'buyer', 'vendor', 'shop_name', 'total_price', 'created_at')
+    search_fields = ('shop_name', 'buyer__username', 'vendor__username')
+    inlines = [OrderLineInline]
+
+
+admin.site.register(Checkout)
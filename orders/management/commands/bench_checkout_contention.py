@@ -0,0 +1,101 @@
+# orders/management/commands/bench_checkout_contention.py
+import statistics
+import threading
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from orders.models import OrderLine
+from orders.utils import OutOfStock, place_orders
+from products.models import Product
+from users.models import CustomUser
+
+
+def race(buyers, product, quantity):
+    """Every buyer checks out `quantity` of `product` at once. Returns (seconds, units sold, errors)."""
+    start = threading.Barrier(len(buyers) + 1)
+    sold = []
+    errors = []
+
+    def buy(buyer):
+        try:
+            start.wait()
+            with transaction.atomic():
+                _, placed, _ = place_orders(buyer, [{'items': [{'id': product.pk, 'qty': quantity}]}])
+            sold.append(sum(line.quantity for _, lines in placed for line in lines))
+        except OutOfStock:
+            pass
+        except Exception as e:
+            errors.append(e)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=buy, args=(buyer,)) for buyer in buyers]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    began = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - began, sum(sold), errors
+
+
+class Command(BaseCommand):
+    help = (
+        "Race many concurrent checkouts for the last units of one product and report "
+        "checkouts/sec, verifying nothing is oversold. Checkouts commit, so the seeded "
+        "users, product and orders are deleted afterwards. Refuses to run unless DEBUG "
+        "is on or --allow-live-db is passed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--buyers', type=int, default=24, help='Concurrent checkouts per round.')
+        parser.add_argument('--stock', type=int, default=10, help='Units on sale in each round.')
+        parser.add_argument('--quantity', type=int, default=1, help='Units each buyer asks for.')
+        parser.add_argument('--rounds', type=int, default=5, help='Timed rounds.')
+        parser.add_argument(
+            '--allow-live-db', action='store_true',
+            help='Run even with DEBUG off, i.e. against a database that may be serving traffic.',
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['allow_live_db']:
+            raise CommandError('DEBUG is off: this may be the live database. Pass --allow-live-db to run it anyway.')
+
+        vendor = CustomUser.objects.create_user(username='bench-contention-vendor', password='!', role='VENDOR')
+        buyers = [
+            CustomUser.objects.create_user(username=f'bench-contention-buyer-{i}', password='!')
+            for i in range(options['buyers'])
+        ]
+        product = Product.objects.create(vendor=vendor, name='Ube Jam', description='Jar', price=Decimal('180.00'))
+        timings = []
+        try:
+            for round_number in range(1, options['rounds'] + 1):
+                Product.objects.filter(pk=product.pk).update(stock=options['stock'])
+                OrderLine.objects.filter(product=product).delete()
+
+                elapsed, sold, errors = race(buyers, product, options['quantity'])
+                if errors:
+                    raise CommandError(f'Round {round_number} failed: {errors[0]!r}')
+                product.refresh_from_db()
+                if sold > options['stock'] or product.stock != options['stock'] - sold:
+                    raise CommandError(f'Round {round_number} oversold: {sold} sold, {product.stock} left')
+
+                timings.append(elapsed)
+                self.stdout.write(
+                    f"round {round_number}: {elapsed * 1000:8.1f} ms  "
+                    f"{len(buyers) / elapsed:>8,.0f} checkouts/s  {sold} units sold"
+                )
+        finally:
+            # Buyers cascade to their checkouts and orders, the vendor to the product
+            CustomUser.objects.filter(pk__in=[buyer.pk for buyer in buyers]).delete()
+            vendor.delete()
+
+        median = statistics.median(timings)
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(buyers)} concurrent checkouts on {options['stock']} units: "
+            f"median {median * 1000:.1f} ms, {len(buyers) / median:,.0f} checkouts/s, never oversold"
+        ))
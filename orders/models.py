@@ -0,0 +1,56 @@
+# orders/models.py
+from django.db import models
+from products.models import Product
+from users.models import CustomUser
+
+
+class Checkout(models.Model):
+    """
+    One POST to checkout_api. Remembers the response so a retried request
+    carrying the same Idempotency-Key gets it back instead of new orders.
+    """
+    buyer = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='checkouts')
+    idempotency_key = models.CharField(max_length=255, null=True, blank=True)
+    response = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Checkout {self.pk} by {self.buyer.username}"
+
+    class Meta:
+        constraints = [
+            # NULL keys (clients that send none) never conflict.
+            models.UniqueConstraint(fields=['buyer', 'idempotency_key'], name='checkout_idempotency_key_uniq'),
+        ]
+
+
+class Order(models.Model):
+    """The part of a checkout sold by a single vendor."""
+    checkout = models.ForeignKey(Checkout, on_delete=models.CASCADE, related_name='orders')
+    buyer = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='orders')
+    vendor = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, related_name='sales')
+    shop_name = models.CharField(max_length=255)
+    total_price = models.DecimalField(max_digits=12, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Order {self.pk} ({self.shop_name})"
+
+    class Meta:
+        indexes = [
+            # Order history, newest first, for each side of the sale
+            models.Index(fields=['buyer', '-created_at', '-id'], name='order_buyer_history_idx'),
+            models.Index(fields=['vendor', '-created_at', '-id'], name='order_vendor_history_idx'),
+        ]
+
+
+class OrderLine(models.Model):
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='lines')
+    # Name and price are copied so the order survives product edits and deletion.
+    product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True, related_name='order_lines')
+    name = models.CharField(max_length=255)
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+    quantity = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f"{self.quantity}x {self.name}"
@@ -0,0 +1,89 @@
+import threading
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+
+from products.models import Product
+from users.models import CustomUser
+from .models import Order, OrderLine
+from .utils import OutOfStock, place_orders
+
+
+def cart(*lines):
+    return [{'items': [{'id': product.pk, 'qty': qty} for product, qty in lines]}]
+
+
+class PartialReservationTests(TestCase):
+    def setUp(self):
+        self.buyer = CustomUser.objects.create_user(username='buyer', password='pass')
+        vendor = CustomUser.objects.create_user(username='vendor', password='pass', role='VENDOR')
+        self.rice = Product.objects.create(vendor=vendor, name='Rice', description='5kg', price=Decimal('250.00'), stock=3)
+        self.eggs = Product.objects.create(vendor=vendor, name='Eggs', description='Tray', price=Decimal('8.50'), stock=1)
+
+    def test_short_lines_are_reported_and_the_rest_is_ordered(self):
+        with transaction.atomic():
+            _, placed, unavailable = place_orders(self.buyer, cart((self.rice, 2), (self.eggs, 5)))
+
+        self.assertEqual(unavailable, [{'product_id': self.eggs.pk, 'name': 'Eggs', 'requested': 5, 'available': 1}])
+        self.assertEqual([(line.product_id, line.quantity) for _, lines in placed for line in lines], [(self.rice.pk, 2)])
+        self.rice.refresh_from_db()
+        self.eggs.refresh_from_db()
+        self.assertEqual((self.rice.stock, self.eggs.stock), (1, 1))
+
+    def test_nothing_available_raises(self):
+        with self.assertRaises(OutOfStock):
+            with transaction.atomic():
+                place_orders(self.buyer, cart((self.eggs, 2)))
+        self.assertFalse(Order.objects.exists())
+
+
+class StockContentionStressTests(TransactionTestCase):
+    """Many buyers racing for the last units of one product must never oversell it."""
+
+    THREADS = 24
+    STOCK = 10
+
+    def test_last_units_are_never_oversold(self):
+        vendor = CustomUser.objects.create_user(username='vendor', password='pass', role='VENDOR')
+        product = Product.objects.create(vendor=vendor, name='Ube Jam', description='Jar', price=Decimal('180.00'), stock=self.STOCK)
+        other = Product.objects.create(vendor=vendor, name='Pandesal', description='Bag', price=Decimal('30.00'), stock=1000)
+        buyers = [CustomUser.objects.create_user(username=f'buyer-{i}', password='pass') for i in range(self.THREADS)]
+
+        start = threading.Barrier(self.THREADS)
+        results = []
+        errors = []
+
+        def buy(buyer, qty):
+            try:
+                start.wait()
+                # Every cart also holds a second product, listed in the opposite
+                # order for half the buyers, to exercise the lock ordering.
+                lines = [(product, qty), (other, 1)] if buyer.pk % 2 else [(other, 1), (product, qty)]
+                with transaction.atomic():
+                    _, placed, unavailable = place_orders(buyer, cart(*lines))
+                results.append(sum(line.quantity for _, ls in placed for line in ls if line.product_id == product.pk))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=buy, args=(buyer, 1 + i % 2))
+            for i, buyer in enumerate(buyers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        product.refresh_from_db()
+        sold = sum(results)
+        self.assertLessEqual(sold, self.STOCK)
+        self.assertEqual(product.stock, self.STOCK - sold)
+        self.assertEqual(
+            sum(OrderLine.objects.filter(product=product).values_list('quantity', flat=True)), sold,
+        )
+        # 1 or 2 units per buyer and far more demand than supply: at most one unit can be left
+        self.assertLessEqual(product.stock, 1)
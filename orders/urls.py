@@ -0,0 +1,7 @@
+# orders/urls.py
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('api/history/', views.order_history_api, name='order_history_api'),
+]
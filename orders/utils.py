@@ -0,0 +1,163 @@
+# orders/utils.py
+from django.db.models import Case, F, Q, When
+from django.db.models.functions import Now
+from products.models import Product
+from .models import Checkout, Order, OrderLine
+
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+class CheckoutError(ValueError):
+    """The cart cannot be turned into orders; the message is shown to the buyer."""
+
+
+class OutOfStock(CheckoutError):
+    """Not a single line of the cart could be reserved."""
+
+    def __init__(self, unavailable):
+        super().__init__('The items in your cart are out of stock.')
+        self.unavailable = unavailable
+
+
+def idempotency_key(request):
+    key = request.headers.get('Idempotency-Key', '').strip()
+    return key[:IDEMPOTENCY_KEY_MAX_LENGTH] or None
+
+
+def stored_checkout_response(buyer, key):
+    """The response recorded for an earlier checkout with this key, or None."""
+    if not key:
+        return None
+    return Checkout.objects.filter(buyer=buyer, idempotency_key=key).values_list('response', flat=True).first()
+
+
+def cart_quantities(grouped_orders):
+    """{product_id: quantity} from the cart payload, which is grouped per vendor."""
+    quantities = {}
+    for order in grouped_orders:
+        for item in order.get('items', []):
+            try:
+                product_id, qty = int(item['id']), int(item['qty'])
+            except (KeyError, TypeError, ValueError):
+                raise CheckoutError('Every cart item needs a product id and a quantity.')
+            if qty < 1:
+                raise CheckoutError('Quantities must be at least 1.')
+            quantities[product_id] = quantities.get(product_id, 0) + qty
+    if not quantities:
+        raise CheckoutError('Cart is empty or invalid.')
+    return quantities
+
+
+def reserve_stock(quantities):
+    """
+    Take `quantities` ({product_id: qty}) out of stock for every line that
+    can be filled completely. Call inside transaction.atomic().
+
+    Rows are locked in primary-key order, so concurrent checkouts over
+    overlapping carts queue up instead of deadlocking. The decrement is a
+    single UPDATE whose WHERE clause re-checks stock >= qty for each row.
+    Returns (reserved, shortages) as {product_id: qty} and
+    {product_id: units available}.
+    """
+    stock = dict(
+        Product.objects.select_for_update().filter(pk__in=quantities).order_by('pk').values_list('pk', 'stock')
+    )
+    shortages = {pk: stock.get(pk, 0) for pk, qty in quantities.items() if stock.get(pk, 0) < qty}
+    reserved = {pk: qty for pk, qty in quantities.items() if pk not in shortages}
+    if reserved:
+        guard = Q()
+        for pk, qty in reserved.items():
+            guard |= Q(pk=pk, stock__gte=qty)
+        updated = Product.objects.filter(guard).update(
+            stock=Case(*[When(pk=pk, then=F('stock') - qty) for pk, qty in reserved.items()]),
+            # moves the detail API's ETag so shoppers see the new stock
+            updated_at=Now(),
+        )
+        if updated != len(reserved):
+            raise RuntimeError('Stock changed while its rows were locked.')
+    return reserved, shortages
+
+
+def place_orders(buyer, grouped_orders, key=None):
+    """
+    Persist a Checkout with one Order per vendor, priced from the database,
+    for every line whose stock could be reserved. Call inside
+    transaction.atomic(). Returns (checkout, [(order, lines)], unavailable)
+    where `unavailable` describes the lines that were left out.
+
+    Raises OutOfStock if no line could be reserved, CheckoutError for an
+    unusable cart, and IntegrityError if `key` was already used by this buyer.
+    """
+    quantities = cart_quantities(grouped_orders)
+    products = {
+        row['id']: row for row in Product.objects.filter(pk__in=quantities).values(
+            'id', 'name', 'price', 'vendor_id', shop_name=F('vendor__vendorprofile__shop_name'),
+        )
+    }
+    if products.keys() != quantities.keys():
+        raise CheckoutError('Some items in your cart are no longer available. Please refresh your cart.')
+
+    # Claim the key first: a concurrent replay blocks here until we commit.
+    checkout = Checkout.objects.create(buyer=buyer, idempotency_key=key)
+
+    reserved, shortages = reserve_stock(quantities)
+    unavailable = [{
+        'product_id': product_id,
+        'name': products[product_id]['name'],
+        'requested': quantities[product_id],
+        'available': available,
+    } for product_id, available in shortages.items()]
+    if not reserved:
+        raise OutOfStock(unavailable)
+
+    by_vendor = {}
+    for product_id, qty in reserved.items():
+        product = products[product_id]
+        by_vendor.setdefault(product['vendor_id'], []).append(OrderLine(
+            product_id=product_id, name=product['name'], unit_price=product['price'], quantity=qty,
+        ))
+
+    orders = Order.objects.bulk_create([
+        Order(
+            checkout=checkout,
+            buyer=buyer,
+            vendor_id=vendor_id,
+            shop_name=products[lines[0].product_id]['shop_name'] or 'Unknown Vendor',
+            total_price=sum(line.unit_price * line.quantity for line in lines),
+        )
+        for vendor_id, lines in by_vendor.items()
+    ])
+    placed = list(zip(orders, by_vendor.values()))
+    for order, lines in placed:
+        for line in lines:
+            line.order = order
+    OrderLine.objects.bulk_create([line for _, lines in placed for line in lines])
+    return checkout, placed, unavailable
+
+
+def receipt_orders(placed):
+    """The per-vendor payload send_checkout_receipts expects, from placed orders."""
+    return [{
+        'vendor_id': order.vendor_id,
+        'shop_name': order.shop_name,
+        'total_price': float(order.total_price),
+        'items': [{'qty': line.quantity, 'name': line.name, 'price': str(line.unit_price)} for line in lines],
+    } for order, lines in placed]
+
+
+def serialize_order(order):
+    return {
+        'id': order.pk,
+        'checkout_id': order.checkout_id,
+        'buyer_id': order.buyer_id,
+        'vendor_id': order.vendor_id,
+        'shop_name': order.shop_name,
+        'total_price': float(order.total_price),
+        'created_at': order.created_at.isoformat(),
+        'lines': [{
+            'product_id': line.product_id,
+            'name': line.name,
+            'unit_price': float(line.unit_price),
+            'quantity': line.quantity,
+        } for line in order.lines.all()],
+    }
@@ -0,0 +1,35 @@
+# orders/views.py
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from sarisari_project.pagination import InvalidCursor, keyset_page, parse_limit
+from .models import Order
+from .utils import serialize_order
+
+HISTORY_ORDERING = ('-created_at', '-id')
+
+
+@login_required
+def order_history_api(request):
+    """
+    The signed-in user's orders, newest first, one keyset page at a time.
+    ?role=vendor lists the user's sales instead of their purchases.
+    """
+    role = request.GET.get('role', 'buyer')
+    if role == 'vendor':
+        orders = Order.objects.filter(vendor=request.user)
+    elif role == 'buyer':
+        orders = Order.objects.filter(buyer=request.user)
+    else:
+        return JsonResponse({'error': "role must be 'buyer' or 'vendor'"}, status=400)
+
+    try:
+        rows, next_cursor = keyset_page(
+            orders.prefetch_related('lines'),
+            HISTORY_ORDERING,
+            cursor=request.GET.get('cursor'),
+            limit=parse_limit(request.GET.get('limit')),
+        )
+    except InvalidCursor as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    return JsonResponse({'orders': [serialize_order(order) for order in rows], 'next_cursor': next_cursor})
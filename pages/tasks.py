@@ -0,0 +1,63 @@
+# pages/tasks.py
+from django.db import transaction
+from django.urls import reverse
+from jobs.utils import task
+from messaging.models import Message
+from messaging.summaries import record_messages
+from messaging.utils import get_or_create_conversations, publish_messages
+from notifications.models import Notification
+from notifications.utils import notifications_created
+from users.models import CustomUser
+
+
+@task()
+def send_checkout_receipts(buyer_id, orders, placed_at):
+    """
+    Post a receipt message in each vendor's conversation with the buyer and
+    notify both sides. `orders` is the cart payload grouped per vendor.
+
+    Vendors, conversations, messages and notifications are each loaded or
+    written in bulk, so the query count does not grow with the cart.
+    """
+    vendor_ids = [int(order['vendor_id']) for order in orders]
+    with transaction.atomic():
+        users = CustomUser.objects.in_bulk([buyer_id, *vendor_ids])
+        buyer = users[buyer_id]
+        conversation_ids = get_or_create_conversations(buyer, vendor_ids)
+
+        # 1. Notify the Consumer (Buyer)
+        total_items = sum(len(order['items']) for order in orders)
+        notifications = [Notification(
+            recipient=buyer,
+            message=f"Order placed successfully! You checked out {total_items} item(s) from {len(orders)} vendor(s).",
+            link="#",
+        )]
+        receipts = []
+
+        # 2. Receipt message and notification per vendor
+        for order, vendor_id in zip(orders, vendor_ids):
+            if vendor_id == buyer_id:
+                continue  # no receipt conversation with yourself
+            vendor = users[vendor_id]
+            conversation_id = conversation_ids[vendor_id]
+
+            receipt_body = f"Thank you for your sale, {vendor.username}!\n"
+            receipt_body += f"NEW ORDER from {buyer.username} (Consumer):\n\n"
+            for item in order['items']:
+                receipt_body += f"- {item['qty']}x {item['name']} @ ₱{item['price']}\n"
+            receipt_body += f"\nTOTAL SALE: ₱{order['total_price']:.2f}"
+            receipt_body += f"\nOrder placed on: {placed_at}"
+
+            # Sent as the buyer
+            receipts.append(Message(conversation_id=conversation_id, sender=buyer, text_content=receipt_body))
+            notifications.append(Notification(
+                recipient=vendor,
+                message=f"NEW SALE! {buyer.username} checked out {len(order['items'])} item(s) from your shop {order['shop_name']}.",
+                link=reverse('conversation_detail', kwargs={'conversation_id': conversation_id}),
+            ))
+
+        Message.objects.bulk_create(receipts)
+        record_messages(message.pk for message in receipts)
+        publish_messages(receipts)
+        Notification.objects.bulk_create(notifications)
+        notifications_created(notifications)
@@ -1,3 +1,102 @@
+import json
+from decimal import Decimal
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from messaging.models import Conversation, Message
+from notifications.models import Notification
+from orders.models import Checkout, Order
+from products.models import Product
+from users.models import CustomUser
+from .tasks import send_checkout_receipts
+
+
+def make_orders(prefix, count):
+    orders = []
+    for i in range(count):
+        vendor = CustomUser.objects.create_user(username=f'{prefix}-vendor-{i}', password='pass', role='VENDOR')
+        product = Product.objects.create(vendor=vendor, name='Eggs', description='Tray of eggs', price=Decimal('8.50'), stock=100)
+        orders.append({
+            'vendor_id': vendor.pk,
+            'shop_name': f'{vendor.username} shop',
+            'total_price': 25.5,
+            'items': [{'id': product.pk, 'qty': 3, 'name': 'Eggs', 'price': '8.50'}],
+        })
+    return orders
+
+
+class CheckoutReceiptQueryCountTests(TestCase):
+    def setUp(self):
+        self.buyer = CustomUser.objects.create_user(username='buyer', password='pass')
+
+    def _count_queries(self, orders):
+        with CaptureQueriesContext(connection) as ctx:
+            send_checkout_receipts(self.buyer.pk, orders, placed_at='2025-01-01 10:00')
+        return len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_vendors(self):
+        one = self._count_queries(make_orders('one', 1))
+        # Built outside the assertion: only send_checkout_receipts is counted
+        ten = make_orders('ten', 10)
+        with self.assertNumQueries(one):
+            send_checkout_receipts(self.buyer.pk, ten, placed_at='2025-01-01 10:00')
+
+        self.assertEqual(Message.objects.filter(sender=self.buyer).count(), 11)
+        # One buyer notification per checkout plus one per vendor
+        self.assertEqual(Notification.objects.count(), 13)
+
+    def test_existing_conversations_are_reused(self):
+        orders = make_orders('repeat', 4)
+        send_checkout_receipts(self.buyer.pk, orders, placed_at='2025-01-01 10:00')
+        conversations = Conversation.objects.count()
+
+        send_checkout_receipts(self.buyer.pk, orders, placed_at='2025-01-02 10:00')
+
+        self.assertEqual(Conversation.objects.count(), conversations)
+        for conversation in Conversation.objects.all():
+            self.assertEqual(conversation.participants.count(), 2)
+            self.assertEqual(conversation.messages.count(), 2)
+
+
+class CheckoutApiQueryCountTests(TestCase):
+    def setUp(self):
+        self.buyer = CustomUser.objects.create_user(username='buyer', password='pass')
+        self.client.force_login(self.buyer)
+
+    def _checkout(self, orders):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                reverse('checkout_api'), data=json.dumps({'orders': orders}), content_type='application/json',
+            )
+        self.assertEqual(response.json()['status'], 'success')
+        return len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_vendors(self):
+        self.assertEqual(self._checkout(make_orders('one', 1)), self._checkout(make_orders('ten', 10)))
+
+    def test_unknown_product_is_rejected(self):
+        orders = make_orders('gone', 2)
+        orders[1]['items'][0]['id'] = 999999
+        response = self.client.post(
+            reverse('checkout_api'), data=json.dumps({'orders': orders}), content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exists())
 
-# Create your tests here.
+    def test_replayed_idempotency_key_returns_original_result(self):
+        orders = make_orders('retry', 3)
+        responses = [
+            self.client.post(
+                reverse('checkout_api'), data=json.dumps({'orders': orders}),
+                content_type='application/json', headers={'Idempotency-Key': 'checkout-1'},
+            ).json()
+            for _ in range(2)
+        ]
+        self.assertEqual(responses[0], responses[1])
+        self.assertEqual(Checkout.objects.count(), 1)
+        self.assertEqual(Order.objects.count(), 3)
+        # Prices come from the database, not the client payload
+        self.assertEqual(Order.objects.first().total_price, Decimal('25.50'))
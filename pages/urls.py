@@ -17,6 +17,7 @@ urlpatterns = [
     path("loyalty/redeem/", redeem_points, name="redeem_points"),
 
     path('api/recent-searches/', views.recent_searches_api, name='recent_searches_api'),
+    path('api/search-suggestions/', views.search_suggestions_api, name='search_suggestions_api'),
     path('api/recent-searches/delete/', views.delete_search_item_api, name='delete_search_item_api'),
     path('api/recent-searches/clear/', views.clear_search_history_api, name='clear_search_history_api'),
     
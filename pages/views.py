@@ -1,23 +1,33 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import render, redirect
 from products.models import Product
+from products.serializers import card_rows, serialize_cards
+from products.utils import CATALOG_ORDERING, SEARCH_ORDERING, search_products, search_suggestions
+from sarisari_project.pagination import keyset_page
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_POST
-from users.models import SearchHistory, LoyaltyProfile, CustomUser
+from users.models import SearchHistory, LoyaltyProfile
 from django.http import JsonResponse
 from django.urls import reverse
-from django.db.models import Count
-from messaging.models import Conversation, Message
-from notifications.utils import create_notification
+from django.db import IntegrityError, transaction
+from orders.models import Checkout
+from orders.utils import CheckoutError, OutOfStock, idempotency_key, place_orders, receipt_orders, stored_checkout_response
+from .tasks import send_checkout_receipts
 from datetime import datetime
 import json
 
 def about_us_view(request):
     return render(request, 'pages/about.html')
 
+HOME_PAGE_SIZE = 24
+
 def home_view(request):
-    products = Product.objects.all().select_related('vendor__vendorprofile').order_by('-created_at')
+    # Only the first page is rendered; the rest streams in from
+    # product_list_api as the visitor scrolls.
+    rows, next_cursor = keyset_page(card_rows(Product.objects.all()), CATALOG_ORDERING, limit=HOME_PAGE_SIZE)
     context = {
-        'products': products
+        'products': serialize_cards(rows),
+        'next_cursor': next_cursor,
+        'page_size': HOME_PAGE_SIZE,
     }
     return render(request, 'pages/home.html', context)
 
@@ -70,10 +80,8 @@ def search_view(request):
             if recent_entry:
                 recent_entry.save()
 
-        results = Product.objects.filter(
-            name__icontains=query
-        ) | Product.objects.filter(
-            category__icontains=query
+        results = serialize_cards(
+            card_rows(search_products(Product.objects.all(), query)).order_by(*SEARCH_ORDERING)
         )
 
     return render(request, 'pages/search.html', {
@@ -169,6 +177,12 @@ def recent_searches_api(request):
     data = list(searches)
     return JsonResponse({'searches': data})
 
+def search_suggestions_api(request):
+    """
+    Typo-tolerant autocomplete for the navbar search box.
+    """
+    return JsonResponse(search_suggestions(request.GET.get('q', '')))
+
 @login_required
 @require_POST
 def delete_search_item_api(request):
@@ -211,64 +225,43 @@ def checkout_api(request):
         if not grouped_orders:
             return JsonResponse({'status': 'error', 'message': 'Cart is empty or invalid.'}, status=400)
 
-        # 1. Notify the Consumer (Buyer)
-        total_items = sum(len(order['items']) for order in grouped_orders)
-        create_notification(
-            recipient=request.user,
-            message=f"Order placed successfully! You checked out {total_items} item(s) from {len(grouped_orders)} vendor(s).",
-            link="#"
-        )
-
-        # 2. Process Orders per Vendor (Messaging and Notification)
-        for order in grouped_orders:
-            vendor_id = order['vendor_id']
-            vendor = get_object_or_404(CustomUser, pk=vendor_id)
-            shop_name = order['shop_name']
-            total_price = order['total_price']
-            
-            # --- A. Construct Receipt Message ---
-            receipt_body = f"Thank you for your sale, {vendor.username}!\n"
-            receipt_body += f"NEW ORDER from {request.user.username} (Consumer):\n\n"
-            
-            for item in order['items']:
-                receipt_body += f"- {item['qty']}x {item['name']} @ ₱{item['price']}\n"
-            
-            receipt_body += f"\nTOTAL SALE: ₱{total_price:.2f}"
-            receipt_body += f"\nOrder placed on: {datetime.now().strftime('%Y-%m-%d %H:%M')}"
-
-            # --- B. Find or Create Conversation ---
-            conversation = Conversation.objects.annotate(
-                num_participants=Count('participants')
-            ).filter(
-                participants=request.user
-            ).filter(
-                participants=vendor
-            ).filter(
-                num_participants=2
-            ).first()
-
-            if not conversation:
-                conversation = Conversation.objects.create()
-                conversation.participants.add(request.user, vendor)
-            
-            # --- C. Send Receipt Message (as the Buyer) ---
-            Message.objects.create(
-                conversation=conversation,
-                sender=request.user,
-                text_content=receipt_body
-            )
-
-            # --- D. Notify the Vendor ---
-            notification_text = f"NEW SALE! {request.user.username} checked out {len(order['items'])} item(s) from your shop {shop_name}."
-            notification_link = reverse('conversation_detail', kwargs={'conversation_id': conversation.id})
-            
-            create_notification(
-                recipient=vendor,
-                message=notification_text,
-                link=notification_link
-            )
-
-        return JsonResponse({'status': 'success', 'redirect_url': reverse('cart')})
+        # A retried request with the same Idempotency-Key gets the original result
+        key = idempotency_key(request)
+        replay = stored_checkout_response(request.user, key)
+        if replay is not None:
+            return JsonResponse(replay)
+
+        try:
+            with transaction.atomic():
+                checkout, placed, unavailable = place_orders(request.user, grouped_orders, key)
+                response = {
+                    'status': 'success',
+                    'redirect_url': reverse('cart'),
+                    'checkout_id': checkout.pk,
+                    'order_ids': [order.pk for order, _ in placed],
+                    # Lines that could not be reserved; everything else was ordered
+                    'unavailable': unavailable,
+                }
+                Checkout.objects.filter(pk=checkout.pk).update(response=response)
+
+                # Receipts and notifications are written by a background worker
+                send_checkout_receipts.delay(
+                    request.user.pk,
+                    receipt_orders(placed),
+                    placed_at=datetime.now().strftime('%Y-%m-%d %H:%M'),
+                )
+        except IntegrityError:
+            # A concurrent request with the same key committed first
+            replay = stored_checkout_response(request.user, key)
+            if replay is None:
+                raise
+            return JsonResponse(replay)
+        except OutOfStock as e:
+            return JsonResponse({'status': 'error', 'message': str(e), 'unavailable': e.unavailable}, status=409)
+        except CheckoutError as e:
+            return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+
+        return JsonResponse(response)
 
     except json.JSONDecodeError:
         return JsonResponse({'status': 'error', 'message': 'Invalid JSON data.'}, status=400)
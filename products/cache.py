@@ -0,0 +1,105 @@
+# products/cache.py
+"""
+Versioned response cache for product_list_api.
+
+Every cached response is keyed by the catalog "generation" plus the
+normalized query parameters. Saving or deleting a Product or VendorProfile
+bumps the generation (after the transaction commits), which orphans every
+older entry at once, so a stale price can never be served.
+
+The generation lives in Postgres (CatalogGeneration), not in the cache: the
+background worker bumps it too, and with a per-process cache (LocMemCache,
+no REDIS_URL) web processes would never see the worker's bumps. Reading it is
+a primary-key lookup; the cached responses themselves stay in the cache.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+
+from .models import CatalogGeneration
+
+GENERATION_TABLE = CatalogGeneration._meta.db_table
+HITS_KEY = 'catalog:list-cache:hits'
+MISSES_KEY = 'catalog:list-cache:misses'
+LIST_CACHE_TTL = 300  # seconds; old generations simply expire
+
+# Parameters that change the response; everything else is ignored.
+LIST_PARAMS = ('q', 'categories', 'regions', 'min_price', 'max_price', 'limit', 'cursor', 'all', 'facets')
+
+
+def catalog_cache():
+    return caches[getattr(settings, 'CATALOG_CACHE_ALIAS', 'default')]
+
+
+BUMP_GENERATION_SQL = f"""
+    INSERT INTO {GENERATION_TABLE} (id, generation) VALUES (1, 1)
+    ON CONFLICT (id) DO UPDATE SET generation = {GENERATION_TABLE}.generation + 1
+"""
+
+
+def catalog_generation():
+    return CatalogGeneration.objects.filter(pk=1).values_list('generation', flat=True).first() or 0
+
+
+def bump_catalog_generation():
+    with connection.cursor() as cursor:
+        cursor.execute(BUMP_GENERATION_SQL)
+
+
+def _incr_counter(key):
+    cache = catalog_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def _normalize_list_params(params):
+    normalized = {}
+    for name in LIST_PARAMS:
+        value = ' '.join(params.get(name, '').split())
+        if not value:
+            continue
+        if name == 'q':
+            value = value.lower()
+        elif name == 'categories':
+            value = '|'.join(sorted({c.strip() for c in value.split('|') if c.strip()}))
+        elif name == 'regions':
+            value = ','.join(sorted({r.strip().lower() for r in value.split(',') if r.strip()}))
+        normalized[name] = value
+    return normalized
+
+
+def list_cache_key(params):
+    digest = hashlib.sha1(
+        json.dumps(_normalize_list_params(params), sort_keys=True).encode()
+    ).hexdigest()
+    return f'catalog:list:{catalog_generation()}:{digest}'
+
+
+def get_cached_list(key):
+    """Cached response body for `key`, or None. Records the hit or miss."""
+    content = catalog_cache().get(key)
+    _incr_counter(HITS_KEY if content is not None else MISSES_KEY)
+    return content
+
+
+def set_cached_list(key, content):
+    catalog_cache().set(key, content, LIST_CACHE_TTL)
+
+
+def catalog_cache_stats():
+    cache = catalog_cache()
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'generation': catalog_generation(),
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 4) if total else None,
+    }
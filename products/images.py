@@ -0,0 +1,100 @@
+# products/images.py
+"""
+Resized derivatives of product images.
+
+Each uploaded image gets a card thumbnail and a modal-sized copy, both as
+JPEG and WebP. The storage keys are kept in Product.image_variants together
+with the `source` key they were built from, so regeneration is idempotent and
+a replaced image is detected automatically.
+"""
+import logging
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .cache import bump_catalog_generation
+from .models import Product
+
+logger = logging.getLogger(__name__)
+
+# label -> bounding box (aspect ratio is preserved)
+VARIANT_SIZES = {
+    'thumb': (400, 400),
+    'medium': (1000, 1000),
+}
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+
+
+def variants_are_current(product):
+    return bool(product.image) and product.image_variants.get('source') == product.image.name
+
+
+def _encode(image, fmt, **options):
+    buffer = BytesIO()
+    image.save(buffer, fmt, **options)
+    return ContentFile(buffer.getvalue())
+
+
+def build_image_variants(product, storage=default_storage):
+    """Render and upload every derivative of product.image; returns the variants dict."""
+    with product.image.open('rb') as source_file:
+        source = Image.open(source_file)
+        source = ImageOps.exif_transpose(source)
+        source = source.convert('RGB')
+
+    stem = os.path.splitext(os.path.basename(product.image.name))[0]
+    variants = {'source': product.image.name}
+    for label, size in VARIANT_SIZES.items():
+        resized = source.copy()
+        resized.thumbnail(size, Image.LANCZOS)
+        base_key = f'product_images/variants/{product.pk}/{stem}-{label}'
+        variants[label] = {
+            'width': resized.width,
+            'jpeg': storage.save(f'{base_key}.jpg', _encode(resized, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)),
+            'webp': storage.save(f'{base_key}.webp', _encode(resized, 'WEBP', quality=WEBP_QUALITY, method=4)),
+        }
+    return variants
+
+
+def _variant_keys(variants):
+    return {
+        variants[label][fmt]
+        for label in VARIANT_SIZES if label in variants
+        for fmt in ('jpeg', 'webp') if variants[label].get(fmt)
+    }
+
+
+def _delete_variant_files(variants, keep=(), storage=default_storage):
+    for key in _variant_keys(variants):
+        if key not in keep:
+            try:
+                storage.delete(key)
+            except Exception:
+                logger.warning('Could not delete stale image variant %s', key)
+
+
+def ensure_image_variants(product, force=False):
+    """
+    Generate derivatives for `product` unless they already match its image.
+    Returns True if new variants were written.
+    """
+    if not product.image:
+        return False
+    if not force and variants_are_current(product):
+        return False
+
+    old_variants = product.image_variants
+    variants = build_image_variants(product)
+    # update() so this does not re-trigger post_save; updated_at moves so the
+    # detail API's ETag changes, and cached listings are invalidated explicitly.
+    Product.objects.filter(pk=product.pk).update(image_variants=variants, updated_at=timezone.now())
+    product.image_variants = variants
+    transaction.on_commit(bump_catalog_generation)
+    _delete_variant_files(old_variants, keep=_variant_keys(variants))
+    return True
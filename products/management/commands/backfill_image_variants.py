@@ -0,0 +1,67 @@
+# products/management/commands/backfill_image_variants.py
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from products.images import ensure_image_variants, variants_are_current
+from products.models import Product
+
+
+def _process(pk, force):
+    """Generate variants for one product in a worker thread. Returns (pk, error)."""
+    try:
+        product = Product.objects.filter(pk=pk).first()
+        if product is None:
+            return pk, None
+        ensure_image_variants(product, force=force)
+        return pk, None
+    except Exception as e:
+        return pk, str(e)
+    finally:
+        # Each worker thread holds its own connection; don't leak them.
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate resized JPEG/WebP variants for existing product images. "
+        "Products whose variants already match their image are skipped, so an "
+        "interrupted run can simply be started again (or resumed with --start-after)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Parallel image workers.')
+        parser.add_argument('--batch-size', type=int, default=200, help='Products fetched per batch.')
+        parser.add_argument('--start-after', type=int, default=0, help='Only process products with id greater than this.')
+        parser.add_argument('--force', action='store_true', help='Regenerate variants even if they are current.')
+
+    def handle(self, *args, **options):
+        force = options['force']
+        last_id = options['start_after']
+        done = skipped = 0
+        failures = []
+
+        base = Product.objects.exclude(image='').exclude(image__isnull=True).order_by('pk')
+        with ThreadPoolExecutor(max_workers=max(1, options['workers'])) as pool:
+            while True:
+                batch = list(base.filter(pk__gt=last_id).only('pk', 'image', 'image_variants')[:options['batch_size']])
+                if not batch:
+                    break
+                last_id = batch[-1].pk
+
+                pending = [p.pk for p in batch if force or not variants_are_current(p)]
+                skipped += len(batch) - len(pending)
+                for pk, error in pool.map(lambda pk: _process(pk, force), pending):
+                    if error:
+                        failures.append(pk)
+                        self.stderr.write(self.style.WARNING(f"Product {pk}: {error}"))
+                    else:
+                        done += 1
+
+                close_old_connections()
+                self.stdout.write(f"Up to id {last_id}: {done} generated, {skipped} already current, {len(failures)} failed")
+
+        self.stdout.write(self.style.SUCCESS(f"Done. {done} generated, {skipped} skipped, {len(failures)} failed."))
+        if failures:
+            self.stdout.write(f"Failed product ids: {', '.join(map(str, failures))}")
@@ -0,0 +1,85 @@
+# products/management/commands/bench_catalog_serializer.py
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from products.management.seeding import seed_catalog
+from products.models import Product
+from products.serializers import card_rows, image_srcset, serialize_cards, variant_url
+from products.utils import CATALOG_ORDERING
+
+
+def legacy_serialize(queryset):
+    """The per-instance loop product_list_api used before the projection path."""
+    products_data = []
+    for product in queryset.select_related('vendor__vendorprofile'):
+        vendor_profile = getattr(product.vendor, 'vendorprofile', None)
+        shop_name = vendor_profile.shop_name if vendor_profile else 'Unknown Vendor'
+        is_verified = vendor_profile.is_verified if vendor_profile else False
+        image = product.image.name if product.image else None
+        products_data.append({
+            'id': product.pk,
+            'name': product.name,
+            'price': f"₱{product.price}",
+            'image_url': variant_url(image, product.image_variants, 'thumb'),
+            'image_srcset': image_srcset(image, product.image_variants),
+            'image_webp_srcset': image_srcset(image, product.image_variants, 'webp'),
+            'shop_name': shop_name,
+            'vendor_id': product.vendor.pk,
+            'is_verified': is_verified,
+            'is_seasonal': product.is_seasonal,
+        })
+    return products_data
+
+
+def projection_serialize(queryset):
+    return serialize_cards(card_rows(queryset))
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare rows/sec of the legacy model-instance catalog serializer with the "
+        "values()-based projection serializer on a seeded catalog (rolled back afterwards)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=10000, help='Number of products to seed.')
+        parser.add_argument('--vendors', type=int, default=100, help='Number of vendors to seed.')
+        parser.add_argument('--runs', type=int, default=5, help='Timed runs per serializer.')
+        parser.add_argument('--seed', type=int, default=327, help='Random seed for the dataset.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.stdout.write(f"Seeding {options['vendors']} vendors and {options['products']} products...")
+            vendor_ids = seed_catalog(random.Random(options['seed']), options['vendors'], options['products'], prefix='bench')
+            queryset = Product.objects.filter(vendor_id__in=vendor_ids).order_by(*CATALOG_ORDERING)
+
+            # Both paths must produce identical payloads before timing means anything.
+            if legacy_serialize(queryset) != projection_serialize(queryset):
+                self.stderr.write(self.style.ERROR('Serializers disagree; aborting benchmark.'))
+                transaction.set_rollback(True)
+                return
+
+            results = {}
+            for label, serialize in (('legacy loop', legacy_serialize), ('projection', projection_serialize)):
+                timings = []
+                for _ in range(options['runs']):
+                    start = time.perf_counter()
+                    rows = len(serialize(queryset))
+                    timings.append(time.perf_counter() - start)
+                results[label] = (rows, timings)
+
+            transaction.set_rollback(True)
+
+        for label, (rows, timings) in results.items():
+            median = statistics.median(timings)
+            self.stdout.write(
+                f"{label:<12} {rows} rows  median {median * 1000:8.1f} ms  "
+                f"best {min(timings) * 1000:8.1f} ms  {rows / median:>10,.0f} rows/sec"
+            )
+        legacy = statistics.median(results['legacy loop'][1])
+        projection = statistics.median(results['projection'][1])
+        self.stdout.write(self.style.SUCCESS(f"Projection speedup: {legacy / projection:.2f}x"))
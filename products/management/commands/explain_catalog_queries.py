@@ -0,0 +1,166 @@
+# products/management/commands/explain_catalog_queries.py
+import random
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.http import QueryDict
+from django.utils import timezone
+
+from products.management.seeding import seed_catalog
+from products.models import Product
+from products.utils import CATALOG_ORDERING, SEARCH_ORDERING, filter_products
+from sarisari_project.pagination import DEFAULT_PAGE_SIZE, keyset_filter
+from users.models import VendorProfile
+
+# The catalog index pack (products 0008 / users 0017). These are dropped to
+# measure the "before" plans and restored for the "after" plans.
+INDEX_PACK = (
+    'product_category_gin',
+    'product_created_idx',
+    'product_vendor_created_idx',
+    'vendor_is_verified_idx',
+    'vendor_barangay_trgm',
+)
+
+EXECUTION_TIME = re.compile(r'Execution Time: ([\d.]+) ms')
+INDEX_USED = re.compile(r'(?:using|Bitmap Index Scan on) (\w+)')
+
+
+def format_ms(ms):
+    """A plan's execution time, or n/a when EXPLAIN did not report one."""
+    return f'{ms:>9.3f}' if ms is not None else f"{'n/a':>9}"
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway catalog, run EXPLAIN ANALYZE on the queries issued by "
+        "product_list_api, ProductListView and the dashboard with and without the "
+        "catalog index pack, and print the plan and timing differences. "
+        "Everything is rolled back afterwards, but while the \"before\" plans run the "
+        "dropped indexes hold an ACCESS EXCLUSIVE lock on products_product and "
+        "users_vendorprofile, blocking every catalog read. Refuses to run unless "
+        "DEBUG is on or --allow-live-db is passed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=20000, help='Number of products to seed.')
+        parser.add_argument('--vendors', type=int, default=200, help='Number of vendors to seed.')
+        parser.add_argument('--seed', type=int, default=327, help='Random seed for the dataset.')
+        parser.add_argument('--verbose-plans', action='store_true', help='Print the full before/after plans.')
+        parser.add_argument(
+            '--allow-live-db', action='store_true',
+            help='Run even with DEBUG off, i.e. against a database that may be serving traffic.',
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['allow_live_db']:
+            raise CommandError(
+                'DEBUG is off: this may be the live database. The command seeds test rows and locks '
+                'products_product and users_vendorprofile (ACCESS EXCLUSIVE) while it runs. '
+                'Pass --allow-live-db to run it anyway.'
+            )
+        rng = random.Random(options['seed'])
+
+        with transaction.atomic():
+            self.stdout.write(f"Seeding {options['vendors']} vendors and {options['products']} products...")
+            sample_vendor_id = seed_catalog(rng, options['vendors'], options['products'], prefix='explain')[0]
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE products_product')
+                cursor.execute('ANALYZE users_vendorprofile')
+
+            queries = self.build_queries(sample_vendor_id)
+
+            savepoint = transaction.savepoint()
+            with connection.cursor() as cursor:
+                for index_name in INDEX_PACK:
+                    cursor.execute(f'DROP INDEX IF EXISTS {connection.ops.quote_name(index_name)}')
+            before = {label: self.explain(sql, params) for label, sql, params in queries}
+            transaction.savepoint_rollback(savepoint)
+
+            after = {label: self.explain(sql, params) for label, sql, params in queries}
+
+            self.report(queries, before, after, options['verbose_plans'])
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS('Done. Seed data and index changes were rolled back.'))
+
+    def build_queries(self, vendor_id):
+        """(label, sql, params) for each query the views actually issue."""
+        def sql_of(queryset):
+            return queryset.query.sql_with_params()
+
+        def count_of(queryset):
+            sql, params = queryset.order_by().values('pk').query.sql_with_params()
+            return f'SELECT COUNT(*) FROM ({sql}) AS counted', params
+
+        def api_page(query_string, ordering=CATALOG_ORDERING):
+            queryset = filter_products(QueryDict(query_string), Product.objects.select_related('vendor__vendorprofile'))
+            return queryset.order_by(*ordering)[:DEFAULT_PAGE_SIZE + 1]
+
+        # A cursor from the middle of the catalog, as a deep page would send.
+        middle = Product.objects.order_by(*CATALOG_ORDERING).values_list('created_at', 'id')[Product.objects.count() // 2]
+        deep_page = (
+            Product.objects.select_related('vendor__vendorprofile')
+            .filter(keyset_filter(CATALOG_ORDERING, list(middle)))
+            .order_by(*CATALOG_ORDERING)[:DEFAULT_PAGE_SIZE + 1]
+        )
+
+        week_start = timezone.now() - timedelta(days=7)
+        return [
+            ('product_list_api: first page', *sql_of(api_page(''))),
+            ('product_list_api: deep page (cursor)', *sql_of(deep_page)),
+            ('product_list_api: category filter', *sql_of(api_page('categories=Fresh Produce'))),
+            ('product_list_api: barangay filter', *sql_of(api_page('regions=Lahug'))),
+            ('product_list_api: search', *sql_of(api_page('q=fresh mango', SEARCH_ORDERING))),
+            ('ProductListView', *sql_of(Product.objects.filter(vendor_id=vendor_id).order_by('-created_at'))),
+            ('dashboard: pending applications count', *count_of(VendorProfile.objects.filter(is_verified=False))),
+            ('dashboard: vendor verification list', *sql_of(VendorProfile.objects.filter(is_verified=False).select_related('user'))),
+            # Same shape as dashboard.views.products_per_day_chart
+            ('dashboard: products per day', *sql_of(
+                Product.objects.filter(created_at__gte=week_start)
+                .annotate(day=TruncDate('created_at')).values('day').annotate(count=Count('id'))
+            )),
+            ('dashboard: recent products', *sql_of(Product.objects.select_related('vendor').order_by('-created_at')[:5])),
+        ]
+
+    def explain(self, sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN (ANALYZE, BUFFERS) ' + sql, params)
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+        match = EXECUTION_TIME.search(plan)
+        return {
+            'plan': plan,
+            'ms': float(match.group(1)) if match else None,
+            'indexes': sorted(set(INDEX_USED.findall(plan))),
+        }
+
+    def report(self, queries, before, after, verbose):
+        used_from_pack = set()
+        for label, _, _ in queries:
+            old, new = before[label], after[label]
+            pack_hits = [name for name in new['indexes'] if name in INDEX_PACK]
+            used_from_pack.update(pack_hits)
+            speedup = f"{old['ms'] / new['ms']:.1f}x" if old['ms'] and new['ms'] else 'n/a'
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f'== {label} =='))
+            self.stdout.write(f"  before: {format_ms(old['ms'])} ms  indexes: {', '.join(old['indexes']) or '(none)'}")
+            self.stdout.write(f"  after:  {format_ms(new['ms'])} ms  indexes: {', '.join(new['indexes']) or '(none)'}  [{speedup}]")
+            if pack_hits:
+                self.stdout.write(self.style.SUCCESS(f"  uses index pack: {', '.join(pack_hits)}"))
+            if verbose:
+                self.stdout.write('  --- before plan ---')
+                self.stdout.write('\n'.join('  ' + line for line in old['plan'].splitlines()))
+                self.stdout.write('  --- after plan ---')
+                self.stdout.write('\n'.join('  ' + line for line in new['plan'].splitlines()))
+
+        unused = [name for name in INDEX_PACK if name not in used_from_pack]
+        self.stdout.write('')
+        if unused:
+            self.stdout.write(self.style.WARNING(f"Index pack entries not used by any plan: {', '.join(unused)}"))
+        else:
+            self.stdout.write(self.style.SUCCESS('Every index in the pack is used by at least one plan.'))
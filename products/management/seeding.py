@@ -0,0 +1,61 @@
+# products/management/seeding.py
+"""
+Throwaway catalog data for the benchmarking/EXPLAIN management commands.
+Callers are expected to run inside a transaction they roll back.
+"""
+from django.db import connection
+
+from products.models import Product
+from products.utils import update_search_vectors
+from users.models import CustomUser, VendorProfile
+
+BARANGAYS = ['Apas', 'Capitol Site', 'Lahug', 'Mabolo', 'Talamban', 'Guadalupe', 'Banilad', 'Kasambagan', 'Labangon', 'Tisa']
+PRODUCE = ['Tomatoes', 'Eggplant', 'Rice', 'Eggs', 'Chicken', 'Mango', 'Banana', 'Coconut', 'Pork', 'Tilapia',
+           'Cabbage', 'Onion', 'Garlic', 'Calamansi', 'Squash', 'Ampalaya', 'Kangkong', 'Malunggay', 'Corn', 'Peanuts']
+ADJECTIVES = ['Fresh', 'Organic', 'Local', 'Native', 'Premium', 'Farm']
+
+
+def seed_catalog(rng, vendor_count, product_count, prefix='seed'):
+    """
+    Create `vendor_count` vendors (with profiles) and `product_count`
+    products spread over the last year. Returns the seeded vendor IDs.
+    """
+    vendors = CustomUser.objects.bulk_create([
+        CustomUser(username=f'{prefix}-vendor-{i}', role=CustomUser.Role.VENDOR, password='!')
+        for i in range(vendor_count)
+    ])
+    profiles = VendorProfile.objects.bulk_create([
+        VendorProfile(
+            user=vendor,
+            shop_name=f"{rng.choice(BARANGAYS)} {rng.choice(PRODUCE)} Stall {vendor.pk}",
+            barangay=rng.choice(BARANGAYS),
+            is_verified=rng.random() < 0.8,
+        )
+        for vendor in vendors
+    ])
+
+    categories = [value for value, _ in Product.Category.choices]
+    Product.objects.bulk_create([
+        Product(
+            vendor=rng.choice(vendors),
+            name=f"{rng.choice(ADJECTIVES)} {rng.choice(PRODUCE)}",
+            description=f"{rng.choice(ADJECTIVES)} {rng.choice(PRODUCE).lower()} from {rng.choice(BARANGAYS)}.",
+            price=round(rng.uniform(10, 800), 2),
+            category=rng.sample(categories, rng.randint(1, 2)),
+            stock=rng.randint(0, 200),
+            image='product_images/eggs.jpg' if rng.random() < 0.7 else None,
+        )
+        for _ in range(product_count)
+    ], batch_size=2000)
+
+    # Spread creation dates over a year so date ranges are selective.
+    vendor_ids = [vendor.pk for vendor in vendors]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "UPDATE products_product SET created_at = now() - random() * interval '365 days' "
+            "WHERE vendor_id = ANY(%s)",
+            [vendor_ids],
+        )
+    for profile in profiles:
+        update_search_vectors(Product.objects.filter(vendor_id=profile.user_id), profile.shop_name, profile.barangay)
+    return vendor_ids
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.6 on 2026-10-17 21:10
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations, models
+
+# Mirrors products.utils.product_search_vector for rows that already exist.
+BACKFILL_SEARCH_VECTOR = """
+UPDATE products_product AS p SET search_vector =
+    setweight(to_tsvector('english', COALESCE(p.name, '')), 'A')
+    || setweight(to_tsvector('english', COALESCE(array_to_string(p.category, ' '), '')), 'B')
+    || setweight(to_tsvector('english', COALESCE((
+        SELECT COALESCE(v.shop_name, '') || ' ' || COALESCE(v.barangay, '')
+        FROM users_vendorprofile AS v WHERE v.user_id = p.vendor_id
+    ), '')), 'B')
+    || setweight(to_tsvector('english', COALESCE(p.description, '')), 'C');
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_alter_product_category'),
+        ('users', '0015_suspension_system'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='category',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(choices=[('Fresh Produce', 'Fresh Produce'), ('Grains and Staples', 'Grains and Staples'), ('Packaged Goods', 'Packaged Goods'), ('Dairy & Eggs', 'Dairy & Eggs'), ('Meat, Poultry and Seafood', 'Meat, Poultry and Seafood'), ('Local & Specialty Products', 'Local & Specialty Products'), ('Services', 'Services')], max_length=50), blank=True, default=list, size=None),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='product_search_vector_gin'),
+        ),
+        migrations.RunSQL(BACKFILL_SEARCH_VECTOR, migrations.RunSQL.noop),
+    ]
@@ -3,6 +3,8 @@
 from django.db import models
 from users.models import CustomUser
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 
 class Product(models.Model):
     class Category(models.TextChoices):
@@ -27,9 +29,41 @@ class Product(models.Model):
     
     stock = models.PositiveIntegerField(default=0)
     image = models.ImageField(upload_to='product_images/', blank=True, null=True)
+    # Resized JPEG/WebP derivatives of `image`, keyed by size, plus the
+    # `source` key they were generated from (see products.images).
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     is_seasonal = models.BooleanField(default=False, help_text="Mark if this product is currently in season")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Weighted full-text document over name, categories, vendor shop/barangay
+    # and description. Maintained by products.signals; never edited by hand.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='product_search_vector_gin'),
+            # Trigram index for typo-tolerant name suggestions
+            GinIndex(fields=['name'], opclasses=['gin_trgm_ops'], name='product_name_trgm'),
+            # category__overlap filters
+            GinIndex(fields=['category'], name='product_category_gin'),
+            # Catalog ordering / keyset pagination and the dashboard date range
+            models.Index(fields=['created_at', 'id'], name='product_created_idx'),
+            # A vendor's own listing (ProductListView)
+            models.Index(fields=['vendor', 'created_at'], name='product_vendor_created_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class CatalogGeneration(models.Model):
+    """
+    The catalog generation that versions cached product_list_api responses
+    (see products.cache). A single row in Postgres, so web and worker
+    processes share it whatever the cache backend.
+    """
+    generation = models.BigIntegerField(default=0)
+
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return f"Catalog generation {self.generation}"
@@ -0,0 +1,78 @@
+# products/serializers.py
+"""
+Lean serialization for catalog listings (product cards).
+
+Rows are fetched with values() so only the card columns (plus the joined
+vendor shop name and verification flag) leave the database, and no Product,
+CustomUser or VendorProfile instances are built.
+"""
+from django.conf import settings
+from django.db.models import F
+from django.utils.encoding import filepath_to_uri
+
+PLACEHOLDER_IMAGE = '/static/icons/placeholder.png'
+
+CARD_FIELDS = ('id', 'name', 'price', 'image', 'image_variants', 'is_seasonal', 'created_at', 'vendor_id')
+
+
+def card_rows(queryset):
+    """Project a Product queryset down to the columns a product card needs."""
+    fields = list(CARD_FIELDS)
+    # Keep the search rank so keyset pagination can read it from the row
+    if 'rank' in queryset.query.annotations:
+        fields.append('rank')
+    return queryset.values(
+        *fields,
+        shop_name=F('vendor__vendorprofile__shop_name'),
+        is_verified=F('vendor__vendorprofile__is_verified'),
+    )
+
+
+def image_url(name):
+    """
+    Public URL of a stored image. MEDIA_URL already points at the public
+    bucket (or /media/ in development), so this avoids a storage call per row.
+    """
+    if not name:
+        return PLACEHOLDER_IMAGE
+    return f'{settings.MEDIA_URL}{filepath_to_uri(name)}'
+
+
+def variant_url(image, variants, label, fmt='jpeg'):
+    """
+    URL of a resized derivative (see products.images), falling back to the
+    original upload while its variants have not been generated yet.
+    """
+    if image and variants.get('source') == image and label in variants:
+        return image_url(variants[label][fmt])
+    return image_url(image)
+
+
+def image_srcset(image, variants, fmt='jpeg'):
+    """`srcset` value listing every derivative by width, or '' if none exist."""
+    if not image or variants.get('source') != image:
+        return ''
+    return ', '.join(
+        f"{image_url(variant[fmt])} {variant['width']}w"
+        for label, variant in variants.items() if label != 'source'
+    )
+
+
+def serialize_card(row):
+    image, variants = row['image'], row['image_variants'] or {}
+    return {
+        'id': row['id'],
+        'name': row['name'],
+        'price': f"₱{row['price']}",
+        'image_url': variant_url(image, variants, 'thumb'),
+        'image_srcset': image_srcset(image, variants),
+        'image_webp_srcset': image_srcset(image, variants, 'webp'),
+        'shop_name': row['shop_name'] or 'Unknown Vendor',
+        'vendor_id': row['vendor_id'],
+        'is_verified': bool(row['is_verified']),
+        'is_seasonal': row['is_seasonal'],
+    }
+
+
+def serialize_cards(rows):
+    return [serialize_card(row) for row in rows]
@@ -0,0 +1,55 @@
+# products/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from users.models import VendorProfile
+from .cache import bump_catalog_generation
+from .images import variants_are_current
+from .models import Product
+from .tasks import generate_image_variants
+from .utils import update_search_vectors
+
+
+@receiver(post_save, sender=Product)
+def refresh_product_search_vector(sender, instance, **kwargs):
+    """Rebuild the search document after a product is created or edited."""
+    vendor = VendorProfile.objects.filter(user_id=instance.vendor_id).values('shop_name', 'barangay').first() or {}
+    update_search_vectors(
+        Product.objects.filter(pk=instance.pk),
+        vendor.get('shop_name', ''),
+        vendor.get('barangay', ''),
+    )
+
+
+@receiver(post_save, sender=Product)
+def queue_product_image_variants(sender, instance, **kwargs):
+    """Queue thumbnail/modal/WebP derivatives when a new image is uploaded."""
+    if instance.image and not variants_are_current(instance):
+        generate_image_variants.delay(instance.pk)
+
+
+@receiver(post_save, sender=VendorProfile)
+def refresh_vendor_search_vectors(sender, instance, **kwargs):
+    """A renamed shop or moved barangay changes every product's document."""
+    update_search_vectors(
+        Product.objects.filter(vendor_id=instance.user_id),
+        instance.shop_name,
+        instance.barangay,
+    )
+
+
+@receiver(post_delete, sender=VendorProfile)
+def clear_vendor_search_vectors(sender, instance, **kwargs):
+    update_search_vectors(Product.objects.filter(vendor_id=instance.user_id))
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=VendorProfile)
+@receiver(post_delete, sender=VendorProfile)
+def invalidate_catalog_cache(sender, **kwargs):
+    """
+    Orphan every cached catalog response. Deferred until commit so a
+    concurrent request cannot cache pre-commit rows under the new generation.
+    """
+    transaction.on_commit(bump_catalog_generation)
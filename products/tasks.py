@@ -0,0 +1,12 @@
+# products/tasks.py
+from jobs.utils import task
+from .images import ensure_image_variants
+from .models import Product
+
+
+@task(max_attempts=3)
+def generate_image_variants(product_id):
+    """Render the resized derivatives of a product's image off the request path."""
+    product = Product.objects.filter(pk=product_id).first()
+    if product is not None:
+        ensure_image_variants(product)
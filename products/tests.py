@@ -1,3 +1,82 @@
+import random
+from decimal import Decimal
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.http import QueryDict
 from django.test import TestCase
+from django.urls import reverse
+
+from users.models import CustomUser, VendorProfile
+from .cache import bump_catalog_generation, catalog_generation, list_cache_key
+from .management.seeding import seed_catalog
+from .models import Product
+from .utils import PRICE_BUCKETS, filter_products, product_facets
+
+
+class CatalogGenerationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.vendor = CustomUser.objects.create_user(username='vendor', password='pass', role='VENDOR')
+
+    def test_saving_a_product_orphans_cached_listings(self):
+        key = list_cache_key({'q': 'rice'})
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(vendor=self.vendor, name='Rice', description='5kg', price=Decimal('250.00'), stock=3)
+        self.assertNotEqual(list_cache_key({'q': 'rice'}), key)
+
+    def test_bumps_do_not_depend_on_the_local_cache(self):
+        # A bump from another process (the worker) is seen here even though
+        # this process's cache never heard of it
+        generation = catalog_generation()
+        bump_catalog_generation()
+        cache.clear()
+        self.assertEqual(catalog_generation(), generation + 1)
+
+
+class ProductFacetTests(TestCase):
+    def setUp(self):
+        seed_catalog(random.Random(4), vendor_count=6, product_count=120, prefix='facet')
+        self.barangays = sorted(set(VendorProfile.objects.values_list('barangay', flat=True)))
+
+    def expected(self, queryset):
+        """Each facet counted separately through the ORM."""
+        queryset = queryset.order_by()
+        price_ranges = {}
+        for label, low, high in PRICE_BUCKETS:
+            bucket = queryset.filter(price__gte=low)
+            price_ranges[label] = (bucket if high is None else bucket.filter(price__lt=high)).count()
+        barangays = {}
+        for barangay in queryset.values_list('vendor__vendorprofile__barangay', flat=True):
+            barangays[barangay] = barangays.get(barangay, 0) + 1
+        return {
+            'total': queryset.count(),
+            'categories': {
+                value: queryset.filter(category__contains=[value]).count() for value, _ in Product.Category.choices
+            },
+            'barangays': barangays,
+            'price_ranges': price_ranges,
+        }
+
+    def test_facets_match_per_facet_counts(self):
+        for params in (
+            {},
+            {'q': 'fresh'},
+            {'q': 'mango', 'categories': 'Fresh Produce|Dairy & Eggs'},
+            {'categories': 'Grains and Staples'},
+            {'regions': f'{self.barangays[0].lower()},{self.barangays[1]}'},
+            {'min_price': '50', 'max_price': '250'},
+            {'q': 'organic', 'regions': self.barangays[-1], 'min_price': '100'},
+        ):
+            with self.subTest(params=params):
+                queryset = filter_products(QueryDict(urlencode(params)))
+                with self.assertNumQueries(1):
+                    facets = product_facets(queryset)
+                self.assertEqual(facets, self.expected(queryset))
+                self.assertGreater(facets['total'], 0)
 
-# Create your tests here.
+    def test_list_api_returns_facets_for_the_filtered_rows(self):
+        params = {'q': 'fresh', 'min_price': '100', 'facets': '1'}
+        response = self.client.get(reverse('product_list_api'), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['facets'], self.expected(filter_products(QueryDict(urlencode(params)))))
@@ -8,6 +8,7 @@ from .views import (
     ProductDeleteView,
     product_detail_api,
     product_list_api, # Added new API view
+    product_batch_api,
 )
 
 urlpatterns = [
@@ -21,4 +22,7 @@ urlpatterns = [
     
     # NEW API for filtering the product list (AJAX)
     path('api/list/', product_list_api, name='product_list_api'),
+
+    # Batch lookup so the cart can re-validate every line in one request
+    path('api/batch/', product_batch_api, name='product_batch_api'),
 ]
\ No newline at end of file
@@ -0,0 +1,213 @@
+# products/utils.py
+import hashlib
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F, FloatField, Func, Q, TextField, Value
+from django.db.models.functions import Cast
+from users.models import VendorProfile
+from .models import Product
+
+# Newest first; `id` breaks ties so keyset cursors are unambiguous.
+CATALOG_ORDERING = ('-created_at', '-id')
+# Best match first when a search term is present.
+SEARCH_ORDERING = ('-rank', '-created_at', '-id')
+
+SEARCH_CONFIG = 'english'
+
+
+def product_search_vector(shop_name='', barangay=''):
+    """
+    Expression for Product.search_vector. Vendor fields are passed in as
+    values because UPDATE statements cannot join to users_vendorprofile.
+    """
+    categories = Func(F('category'), Value(' '), function='array_to_string', output_field=TextField())
+    vendor_text = Value(f"{shop_name or ''} {barangay or ''}", output_field=TextField())
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector(categories, weight='B', config=SEARCH_CONFIG)
+        + SearchVector(vendor_text, weight='B', config=SEARCH_CONFIG)
+        + SearchVector('description', weight='C', config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vectors(queryset, shop_name='', barangay=''):
+    """Recompute the search document for every product in `queryset`."""
+    return queryset.update(search_vector=product_search_vector(shop_name, barangay))
+
+
+def search_products(queryset, query):
+    """
+    Full-text match against the GIN-indexed search_vector, annotated with
+    `rank` (cast to double so it round-trips exactly through a cursor).
+    """
+    search_query = SearchQuery(query, search_type='websearch', config=SEARCH_CONFIG)
+    return queryset.filter(search_vector=search_query).annotate(
+        rank=Cast(SearchRank(F('search_vector'), search_query), output_field=FloatField())
+    )
+
+
+SUGGESTION_LIMIT = 8
+SUGGESTION_MIN_LENGTH = 2
+# Suggestions are recomputed at most this often per prefix (seconds).
+SUGGESTION_CACHE_TTL = 60
+
+
+def _top_names(queryset, field, term, limit):
+    """
+    Best `limit` distinct values of `field` for `term`. The `%>` operator
+    (trigram_word_similar) is answered by the gin_trgm_ops index and matches
+    both prefixes ("tom" -> "Tomatoes") and misspellings ("tomatos").
+    """
+    rows = (
+        queryset.filter(**{f'{field}__trigram_word_similar': term})
+        .annotate(similarity=TrigramWordSimilarity(term, field))
+        .order_by('-similarity', field)
+        .values_list(field, flat=True)[:limit * 3]
+    )
+    names = []
+    for name in rows:
+        if name not in names:
+            names.append(name)
+        if len(names) == limit:
+            break
+    return names
+
+
+def search_suggestions(term, limit=SUGGESTION_LIMIT):
+    """
+    Product and shop names for the navbar autocomplete, cached briefly per
+    normalized prefix so the hottest keystrokes never reach the database.
+    """
+    term = ' '.join(term.lower().split())
+    if len(term) < SUGGESTION_MIN_LENGTH:
+        return {'products': [], 'shops': []}
+
+    cache_key = 'search-suggest:' + hashlib.md5(f'{term}:{limit}'.encode()).hexdigest()
+    suggestions = cache.get(cache_key)
+    if suggestions is None:
+        suggestions = {
+            'products': _top_names(Product.objects.all(), 'name', term, limit),
+            'shops': _top_names(VendorProfile.objects.all(), 'shop_name', term, limit),
+        }
+        cache.set(cache_key, suggestions, SUGGESTION_CACHE_TTL)
+    return suggestions
+
+
+# (label, lower bound inclusive, upper bound exclusive) for the price facet.
+PRICE_BUCKETS = (
+    ('0-50', 0, 50),
+    ('50-100', 50, 100),
+    ('100-250', 100, 250),
+    ('250-500', 250, 500),
+    ('500+', 500, None),
+)
+
+
+def _price_bucket_sql():
+    cases = []
+    for label, low, high in PRICE_BUCKETS:
+        condition = f'price >= {low}' if high is None else f'price >= {low} AND price < {high}'
+        cases.append(f"WHEN {condition} THEN '{label}'")
+    return 'CASE ' + ' '.join(cases) + ' END'
+
+
+def product_facets(queryset):
+    """
+    Counts per category, vendor barangay and price bucket for `queryset`.
+
+    The filtered rows are materialized once in a CTE and every facet is a
+    GROUP BY over it, so all counts come back from a single query. The CTE's
+    columns keep the names values() gives them (category, price, barangay),
+    so their order, or an extra column such as the search rank, does not matter.
+    """
+    filtered = queryset.order_by().values(
+        'category', 'price', barangay=F('vendor__vendorprofile__barangay'),
+    )
+    filtered_sql, params = filtered.query.sql_with_params()
+    sql = f"""
+        WITH filtered AS MATERIALIZED ({filtered_sql})
+        SELECT 'total', NULL, COUNT(*) FROM filtered
+        UNION ALL
+        SELECT 'category', c, COUNT(*) FROM filtered CROSS JOIN LATERAL unnest(filtered.category) AS c GROUP BY c
+        UNION ALL
+        SELECT 'barangay', TRIM(barangay), COUNT(*) FROM filtered WHERE barangay IS NOT NULL AND TRIM(barangay) <> '' GROUP BY TRIM(barangay)
+        UNION ALL
+        SELECT 'price', {_price_bucket_sql()}, COUNT(*) FROM filtered GROUP BY 2
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    facets = {
+        'total': 0,
+        'categories': {value: 0 for value, _ in Product.Category.choices},
+        'barangays': {},
+        'price_ranges': {label: 0 for label, _, _ in PRICE_BUCKETS},
+    }
+    for facet, value, count in rows:
+        if facet == 'total':
+            facets['total'] = count
+        elif facet == 'category':
+            facets['categories'][value] = count
+        elif facet == 'barangay':
+            facets['barangays'][value] = count
+        elif facet == 'price' and value is not None:
+            facets['price_ranges'][value] = count
+    return facets
+
+
+def catalog_ordering(params):
+    return SEARCH_ORDERING if params.get('q', '').strip() else CATALOG_ORDERING
+
+
+def filter_products(params, queryset=None):
+    """
+    Apply the catalog filters (q, categories, regions, min_price, max_price)
+    from a QueryDict-like `params` to a Product queryset.
+    """
+    if queryset is None:
+        queryset = Product.objects.all()
+
+    query = params.get('q', '').strip()
+    categories = params.get('categories', '')
+    regions = params.get('regions', '')
+    min_price = params.get('min_price')
+    max_price = params.get('max_price')
+
+    # 1. Text Search (ranked full-text match)
+    if query:
+        queryset = search_products(queryset, query)
+
+    # 2. Category Filter (List) using ArrayField
+    if categories:
+        # Use pipe as delimiter since category names contain commas
+        category_list = [cat.strip() for cat in categories.split('|') if cat.strip()]
+        if category_list:
+            # Match products that belong to ANY selected category
+            queryset = queryset.filter(category__overlap=category_list)
+
+    # 3. Location/Barangay Filter (List) - Filter by vendor's barangay
+    if regions:
+        region_list = [barangay.strip() for barangay in regions.split(',') if barangay.strip()]
+        if region_list:
+            # Case-insensitive partial matching on the vendor's barangay
+            barangay_filter = Q()
+            for barangay in region_list:
+                barangay_filter |= Q(vendor__vendorprofile__barangay__icontains=barangay)
+            queryset = queryset.filter(barangay_filter)
+
+    # 4. Price Range Filter
+    if min_price:
+        try:
+            queryset = queryset.filter(price__gte=float(min_price))
+        except ValueError:
+            pass
+
+    if max_price:
+        try:
+            queryset = queryset.filter(price__lte=float(max_price))
+        except ValueError:
+            pass
+
+    return queryset
@@ -1,12 +1,18 @@
-from django.http import JsonResponse
+import hashlib
+from django.http import HttpResponse, JsonResponse
 from django.urls import reverse_lazy
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.shortcuts import get_object_or_404, redirect
 from django.contrib import messages
-from django.db.models import Q
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 from .models import Product
 from .forms import ProductForm
+from .cache import get_cached_list, list_cache_key, set_cached_list
+from .serializers import card_rows, image_srcset, image_url, serialize_cards, variant_url
+from .utils import catalog_ordering, filter_products, product_facets
+from sarisari_project.pagination import InvalidCursor, keyset_page, parse_limit
 from users.suspension_utils import can_user_add_edit_products
 
 class VendorRequiredMixin(UserPassesTestMixin):
@@ -60,11 +66,43 @@ class ProductDeleteView(LoginRequiredMixin, VendorRequiredMixin, DeleteView):
     def get_queryset(self):
         return Product.objects.filter(vendor=self.request.user)
 
+def _product_version(request, pk):
+    """
+    (updated_at, vendor profile updated_at, vendor username) for the product,
+    fetched with one primary-key lookup and memoized on the request so the
+    ETag and Last-Modified callbacks share it.
+    """
+    if not hasattr(request, '_product_version'):
+        request._product_version = Product.objects.filter(pk=pk).values_list(
+            'updated_at', 'vendor__vendorprofile__updated_at', 'vendor__username',
+        ).first()
+    return request._product_version
+
+
+def product_etag(request, pk):
+    version = _product_version(request, pk)
+    if version is None:
+        return None
+    return hashlib.md5(repr(version).encode()).hexdigest()
+
+
+def product_last_modified(request, pk):
+    version = _product_version(request, pk)
+    if version is None:
+        return None
+    return max(ts for ts in version[:2] if ts is not None)
+
+
+# no-cache: browsers may keep the body but must revalidate it every time,
+# which costs a 304 instead of the full select_related fetch.
+@cache_control(no_cache=True)
+@condition(etag_func=product_etag, last_modified_func=product_last_modified)
 def product_detail_api(request, pk):
     try:
         product = Product.objects.select_related('vendor__vendorprofile').get(pk=pk)
         
-        image_url = product.image.url if product.image else '/static/icons/placeholder.png'
+        image = product.image.name if product.image else None
+        variants = product.image_variants
 
         is_verified = False
         if hasattr(product.vendor, 'vendorprofile'):
@@ -80,7 +118,10 @@ def product_detail_api(request, pk):
             'price': f"₱{product.price}",
             'stock': product.stock,
             'category': category_display,
-            'image_url': image_url,
+            'image_url': variant_url(image, variants, 'medium'),
+            'image_srcset': image_srcset(image, variants),
+            'image_webp_srcset': image_srcset(image, variants, 'webp'),
+            'image_original_url': image_url(image),
             'shop_name': product.vendor.vendorprofile.shop_name,
             'seller_name': product.vendor.username,
             'vendor_user_id': product.vendor.pk,
@@ -96,81 +137,85 @@ def product_detail_api(request, pk):
 def product_list_api(request):
     """
     Advanced API endpoint for filtering products.
+
+    Search results are ordered by full-text rank, everything else newest first.
+    Results are keyset-paginated on that ordering: pass `limit` and the
+    `next_cursor` of the previous response as `cursor`. Old clients that need
+    every match in one response can send `all=1`. With `facets=1` the
+    response also carries per-category, barangay and price-bucket counts for
+    the same filter set.
+
+    Responses are cached per catalog generation and normalized parameters.
     """
-    query = request.GET.get('q', '').strip()
-    categories = request.GET.get('categories', '')
-    regions = request.GET.get('regions', '')
-    min_price = request.GET.get('min_price')
-    max_price = request.GET.get('max_price')
-    
-    products_qs = Product.objects.all().select_related('vendor__vendorprofile').order_by('-created_at')
-    
-    # 1. Text Search
-    if query:
-        products_qs = products_qs.filter(
-            Q(name__icontains=query) | 
-            Q(description__icontains=query)
-        )
-
-    # 2. Category Filter (List) using ArrayField
-    if categories:
-        # Check if multiple categories are sent (separated by pipe |)
-        # Use pipe as delimiter since category names contain commas
-        if '|' in categories:
-            category_list = [cat.strip() for cat in categories.split('|') if cat.strip()]
-            if category_list:
-                # Use Q objects with OR logic to show products that match ANY selected category
-                category_filter = Q()
-                for category in category_list:
-                    category_filter |= Q(category__overlap=[category])
-                products_qs = products_qs.filter(category_filter)
-        else:
-            # Single category filter (from home page buttons)
-            category = categories.strip()
-            if category:
-                products_qs = products_qs.filter(category__overlap=[category])
-
-    # 3. Location/Barangay Filter (List) - Filter by vendor's barangay
-    if regions:
-        region_list = [barangay.strip() for barangay in regions.split(',')]
-        if region_list:
-            # Filter products by vendor's barangay field using case-insensitive partial matching
-            barangay_filter = Q()
-            for barangay in region_list:
-                barangay_filter |= Q(vendor__vendorprofile__barangay__icontains=barangay)
-            products_qs = products_qs.filter(barangay_filter)
-
-    # 4. Price Range Filter
-    if min_price:
+    cache_key = list_cache_key(request.GET)
+    cached = get_cached_list(cache_key)
+    if cached is not None:
+        return HttpResponse(cached, content_type='application/json')
+
+    products_qs = filter_products(request.GET)
+    rows = card_rows(products_qs)
+    ordering = catalog_ordering(request.GET)
+
+    next_cursor = None
+    if request.GET.get('all') == '1':
+        rows = rows.order_by(*ordering)
+    else:
         try:
-            products_qs = products_qs.filter(price__gte=float(min_price))
-        except ValueError:
-            pass 
-            
-    if max_price:
-        try:
-            products_qs = products_qs.filter(price__lte=float(max_price))
-        except ValueError:
-            pass
+            rows, next_cursor = keyset_page(
+                rows,
+                ordering,
+                cursor=request.GET.get('cursor'),
+                limit=parse_limit(request.GET.get('limit')),
+            )
+        except InvalidCursor as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+    response = {'products': serialize_cards(rows), 'next_cursor': next_cursor}
+    if request.GET.get('facets') == '1':
+        response['facets'] = product_facets(products_qs)
+
+    json_response = JsonResponse(response)
+    set_cached_list(cache_key, json_response.content)
+    return json_response
+
 
-    # Build Response
-    products_data = []
-    for product in products_qs:
+MAX_BATCH_PRODUCTS = 100
+
+def product_batch_api(request):
+    """
+    Current price, stock, vendor and availability for a list of product IDs
+    (?ids=1,2,3), fetched with one id__in query and grouped per vendor in the
+    same shape checkout_api expects. Used by the cart to re-price itself.
+    """
+    try:
+        ids = [int(pk) for pk in request.GET.get('ids', '').split(',') if pk.strip()]
+    except ValueError:
+        return JsonResponse({'error': 'ids must be a comma-separated list of integers'}, status=400)
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > MAX_BATCH_PRODUCTS:
+        return JsonResponse({'error': f'At most {MAX_BATCH_PRODUCTS} products per request'}, status=400)
+
+    products = Product.objects.filter(id__in=ids).select_related('vendor__vendorprofile')
+
+    orders = {}
+    for product in products:
         vendor_profile = getattr(product.vendor, 'vendorprofile', None)
-        shop_name = vendor_profile.shop_name if vendor_profile else 'Unknown Vendor'
-        is_verified = vendor_profile.is_verified if vendor_profile else False 
-        
-        image_url = product.image.url if product.image else '/static/icons/placeholder.png'
-        
-        products_data.append({
+        order = orders.setdefault(product.vendor_id, {
+            'vendor_id': product.vendor_id,
+            'shop_name': vendor_profile.shop_name if vendor_profile else 'Unknown Vendor',
+            'items': [],
+        })
+        order['items'].append({
             'id': product.pk,
             'name': product.name,
-            'price': f"₱{product.price}",
-            'image_url': image_url,
-            'shop_name': shop_name,
-            'vendor_id': product.vendor.pk,
-            'is_verified': is_verified,
-            'is_seasonal': product.is_seasonal,
+            'price': float(product.price),
+            'stock': product.stock,
+            'available': product.stock > 0,
+            'image_url': variant_url(product.image.name if product.image else None, product.image_variants, 'thumb'),
         })
-        
-    return JsonResponse({'products': products_data})
\ No newline at end of file
+
+    found = {item['id'] for order in orders.values() for item in order['items']}
+    return JsonResponse({
+        'orders': list(orders.values()),
+        'missing': [pk for pk in ids if pk not in found],
+    })
\ No newline at end of file
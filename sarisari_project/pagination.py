@@ -0,0 +1,154 @@
+# sarisari_project/pagination.py
+"""
+Keyset (cursor) pagination shared by the JSON list endpoints.
+
+Instead of OFFSET, each page starts strictly after the ordering values of the
+last row of the previous page, so page N is an index range scan just like
+page 1. The cursor handed to clients is an opaque, URL-safe token.
+"""
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor we did not issue."""
+
+
+def _dump_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, Decimal):
+        return {'dec': str(value)}
+    return value
+
+
+def _load_value(value):
+    if isinstance(value, dict):
+        if len(value) != 1 or not isinstance(next(iter(value.values())), str):
+            raise InvalidCursor('Malformed cursor.')
+        try:
+            if 'dt' in value:
+                parsed = parse_datetime(value['dt'])
+                if parsed is None:
+                    raise InvalidCursor('Malformed cursor.')
+                return parsed
+            if 'dec' in value:
+                return Decimal(value['dec'])
+        except (ValueError, InvalidOperation):
+            raise InvalidCursor('Malformed cursor.')
+        raise InvalidCursor('Malformed cursor.')
+    # null, booleans, lists: nothing we encode
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise InvalidCursor('Malformed cursor.')
+    return value
+
+
+def encode_cursor(values):
+    payload = json.dumps([_dump_value(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, size):
+    """Turn a cursor token back into a list of `size` ordering values."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor('Malformed cursor.')
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor('Malformed cursor.')
+    return [_load_value(v) for v in values]
+
+
+def parse_limit(raw, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Clamp a ?limit= query parameter into 1..maximum."""
+    try:
+        limit = int(raw)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(limit, maximum))
+
+
+def _split_ordering(ordering):
+    return [(field.lstrip('-'), field.startswith('-')) for field in ordering]
+
+
+def keyset_filter(ordering, values):
+    """
+    Build the WHERE clause selecting rows that sort strictly after `values`.
+
+    For ('-created_at', '-id') this is
+    created_at <= c AND (created_at < c OR (created_at = c AND id < i)).
+    The leading non-strict bound lets Postgres turn it into an index range scan.
+    """
+    keys = _split_ordering(ordering)
+    first_field, first_desc = keys[0]
+    bound = Q(**{f"{first_field}__{'lte' if first_desc else 'gte'}": values[0]})
+
+    after = Q()
+    equal = {}
+    for (field, desc), value in zip(keys, values):
+        condition = dict(equal)
+        condition[f"{field}__{'lt' if desc else 'gt'}"] = value
+        after |= Q(**condition)
+        equal[field] = value
+    return bound & after
+
+
+def _check_values(model, ordering, values):
+    """
+    Check decoded cursor values against the ordering columns, so a tampered
+    cursor is an InvalidCursor rather than a database error.
+    """
+    for (field, _), value in zip(_split_ordering(ordering), values):
+        try:
+            model_field = model._meta.get_field(field)
+        except FieldDoesNotExist:
+            # An annotation, such as the search rank
+            if isinstance(value, str):
+                raise InvalidCursor('Malformed cursor.')
+            continue
+        try:
+            column_value = model_field.to_python(value)
+        except (ValidationError, TypeError, ValueError):
+            raise InvalidCursor('Malformed cursor.')
+        # Only exactly what encode_cursor wrote is accepted: no coercion
+        if column_value != value or type(column_value) is not type(value):
+            raise InvalidCursor('Malformed cursor.')
+
+
+def _row_value(row, field):
+    if isinstance(row, dict):
+        return row[field]
+    return getattr(row, field)
+
+
+def keyset_page(queryset, ordering, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Return (rows, next_cursor) for one page of `queryset`.
+
+    `ordering` must end in a unique column (usually '-id') so the cursor is
+    unambiguous. `next_cursor` is None on the last page.
+    """
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        values = decode_cursor(cursor, len(ordering))
+        _check_values(queryset.model, ordering, values)
+        queryset = queryset.filter(keyset_filter(ordering, values))
+
+    rows = list(queryset[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([_row_value(last, field) for field, _ in _split_ordering(ordering)])
+    return rows, next_cursor
@@ -37,6 +37,8 @@ INSTALLED_APPS = [
     'notifications',
     'messaging',
     'dashboard',
+    'jobs',
+    'orders',
 ]
 
 MIDDLEWARE = [
@@ -71,6 +73,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'sarisari_project.wsgi.application'
+ASGI_APPLICATION = 'sarisari_project.asgi.application'
 
 # Database
 DATABASES = {
@@ -84,6 +87,39 @@ DATABASES = {
     }
 }
 
+# Cache
+# Without REDIS_URL each process has its own LocMemCache, which never hears
+# of the worker's changes. Nothing that must agree across processes is kept
+# only there: the catalog generation that invalidates cached listings is in
+# Postgres (products/cache.py), and unread badge counts are read from their
+# counter row instead of being cached (notifications/counters.py). Cached
+# listings are still used, but every process warms its own copy.
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Cache alias used for the versioned product_list_api response cache
+CATALOG_CACHE_ALIAS = os.getenv('CATALOG_CACHE_ALIAS', 'default')
+
+# Live chat fan-out (messaging.fanout). The in-process backend only reaches
+# sockets held by the same worker process; with Redis every worker sees
+# every event.
+MESSAGING_FANOUT_URL = os.getenv('REDIS_URL')
+MESSAGING_FANOUT_BACKEND = os.getenv(
+    'MESSAGING_FANOUT_BACKEND',
+    'messaging.fanout.RedisBackend' if MESSAGING_FANOUT_URL else 'messaging.fanout.InProcessBackend',
+)
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
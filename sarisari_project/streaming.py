@@ -0,0 +1,34 @@
+# sarisari_project/streaming.py
+"""
+Helpers for long-lived async connections (chat WebSockets, notification
+streams).
+
+Such a connection spends nearly all of its life idle. Its ORM calls
+therefore run in the shared thread pool and close their database
+connection afterwards, so an idle client holds neither a thread nor a
+Postgres connection.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+
+def database_sync_to_async(func):
+    """Run ORM code off the event loop without keeping a connection open between calls."""
+    def wrapper(*args):
+        close_old_connections()
+        try:
+            return func(*args)
+        finally:
+            close_old_connections()
+    return sync_to_async(wrapper, thread_sensitive=False)
+
+
+def sse_event(event, data, event_id=None):
+    """One Server-Sent Events frame; `data` is sent as JSON."""
+    lines = [f'event: {event}']
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
@@ -0,0 +1,74 @@
+import base64
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from orders.models import Checkout, Order
+from users.models import CustomUser
+from .pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_page
+
+ORDERING = ('-created_at', '-id')
+
+
+def raw_cursor(values):
+    """A cursor token around arbitrary JSON, as a client could forge one."""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.buyer = CustomUser.objects.create_user(username='buyer', password='pass')
+        checkout = Checkout.objects.create(buyer=self.buyer)
+        now = timezone.now()
+        self.orders = Order.objects.bulk_create([
+            # Two orders share a timestamp so the id tie-break is exercised
+            Order(checkout=checkout, buyer=self.buyer, shop_name=f'Shop {i}', total_price=Decimal('10.00'))
+            for i in range(5)
+        ])
+        for i, order in enumerate(self.orders):
+            Order.objects.filter(pk=order.pk).update(created_at=now - timedelta(minutes=min(i, 3)))
+
+    def test_cursor_round_trip(self):
+        values = [timezone.now(), Decimal('250.50'), 42, 0.75]
+        self.assertEqual(decode_cursor(encode_cursor(values), 4), values)
+
+    def test_pages_cover_every_row_once_in_order(self):
+        seen, cursor = [], None
+        while True:
+            rows, cursor = keyset_page(Order.objects.all(), ORDERING, cursor=cursor, limit=2)
+            seen.extend(order.pk for order in rows)
+            if cursor is None:
+                break
+        self.assertEqual(seen, list(Order.objects.order_by(*ORDERING).values_list('pk', flat=True)))
+
+    def test_malformed_cursors_are_rejected(self):
+        created_at = {'dt': timezone.now().isoformat()}
+        for token in (
+            'not base64!',
+            raw_cursor({'id': 'x'}),
+            raw_cursor([created_at]),
+            raw_cursor([created_at, 'x']),
+            raw_cursor([created_at, '5']),
+            raw_cursor([created_at, None]),
+            raw_cursor([created_at, True]),
+            raw_cursor([created_at, [1]]),
+            raw_cursor([created_at, 1.5]),
+            raw_cursor([5, 5]),
+            raw_cursor([{'dt': 'yesterday'}, 5]),
+            raw_cursor([{'dt': '2024-13-45T00:00:00'}, 5]),
+            raw_cursor([{'dt': 5}, 5]),
+            raw_cursor([{'dec': 'abc'}, 5]),
+            raw_cursor([{'dt': created_at['dt'], 'dec': '1'}, 5]),
+        ):
+            with self.subTest(token=token), self.assertRaises(InvalidCursor):
+                keyset_page(Order.objects.all(), ORDERING, cursor=token)
+
+    def test_tampered_cursor_is_a_bad_request(self):
+        self.client.force_login(self.buyer)
+        response = self.client.get(reverse('order_history_api'), {'cursor': raw_cursor([{'dt': 'x'}, 'x'])})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Malformed cursor.'})
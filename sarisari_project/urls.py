@@ -29,6 +29,7 @@ urlpatterns = [
     path('notifications/', include('notifications.urls')),
     path('messages/', include('messaging.urls')),
     path('dashboard/', include('dashboard.urls')),
+    path('orders/', include('orders.urls')),
 
     # Search routes
     path('', include('pages.urls')),
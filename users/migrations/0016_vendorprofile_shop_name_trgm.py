@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-17 21:11
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0015_suspension_system'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='vendorprofile',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['shop_name'], name='vendor_shop_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-17 21:13
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0016_vendorprofile_shop_name_trgm'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vendorprofile',
+            index=models.Index(fields=['is_verified'], name='vendor_is_verified_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vendorprofile',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('barangay'), name='gin_trgm_ops'), name='vendor_barangay_trgm'),
+        ),
+    ]
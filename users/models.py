@@ -1,6 +1,8 @@
 # users/models.py
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db.models.functions import Upper
 from django.conf import settings
 from django.db.models.signals import post_save
 from django.dispatch import receiver
@@ -85,6 +87,20 @@ class VendorProfile(models.Model):
     
     # --- Region Field ---
     region = models.CharField(max_length=50, choices=Region.choices, default=Region.CEBU_CITY, blank=True, null=True)
+
+    # Drives the ETag / Last-Modified validators of the vendor and product APIs
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Trigram index for typo-tolerant shop name suggestions
+            GinIndex(fields=['shop_name'], opclasses=['gin_trgm_ops'], name='vendor_shop_name_trgm'),
+            # Pending-application counts and lists on the dashboard
+            models.Index(fields=['is_verified'], name='vendor_is_verified_idx'),
+            # barangay__icontains compiles to UPPER(barangay) LIKE '%...%',
+            # which only a trigram index on the same expression can serve
+            GinIndex(OpClass(Upper('barangay'), name='gin_trgm_ops'), name='vendor_barangay_trgm'),
+        ]
     
     def __str__(self):
         return self.shop_name
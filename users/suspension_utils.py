@@ -1,8 +1,9 @@
 # users/suspension_utils.py
 from django.utils import timezone
 from datetime import timedelta
-from notifications.utils import create_notification
+from notifications.utils import batched, create_notification
 
+@batched
 def apply_suspension(user, reason="community guidelines violation"):
     """
     Apply suspension based on user's current suspension count.
@@ -1,3 +1,4 @@
+import hashlib
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, authenticate, logout, update_session_auth_hash
 from django.contrib.auth.forms import AuthenticationForm, PasswordChangeForm
@@ -14,6 +15,8 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from .models import VendorProfile, CustomUser, SearchHistory
 from django.http import JsonResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 from django.db.models import Q
 from django.db import transaction 
 from notifications.utils import create_notification
@@ -70,14 +73,6 @@ def logout_view(request):
     messages.info(request, "You have been successfully logged out.")
     return redirect('login')
 
-def home_view(request):
-    from products.models import Product
-    products = Product.objects.all().select_related('vendor__vendorprofile').order_by('-created_at')
-    context = {
-        'products': products
-    }
-    return render(request, 'pages/home.html', context)
-
 @login_required 
 def profile_view(request):
     user = request.user
@@ -248,6 +243,29 @@ def consumer_vendor_profile_view(request, vendor_id):
     }
     return render(request, 'pages/vendor_public_profile.html', context)
 
+def _vendor_version(request, pk):
+    """(profile updated_at, email) with one indexed lookup, memoized per request."""
+    if not hasattr(request, '_vendor_version'):
+        request._vendor_version = VendorProfile.objects.filter(
+            user_id=pk, user__role='VENDOR'
+        ).values_list('updated_at', 'user__email').first()
+    return request._vendor_version
+
+
+def vendor_etag(request, pk):
+    version = _vendor_version(request, pk)
+    if version is None:
+        return None
+    return hashlib.md5(repr(version).encode()).hexdigest()
+
+
+def vendor_last_modified(request, pk):
+    version = _vendor_version(request, pk)
+    return version[0] if version else None
+
+
+@cache_control(no_cache=True)
+@condition(etag_func=vendor_etag, last_modified_func=vendor_last_modified)
 def vendor_detail_api(request, pk):
     try:
         user = get_object_or_404(CustomUser, pk=pk, role='VENDOR')